@@ -1,29 +1,137 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-from api.filters import DropGameIDFilter, DropPlayerFilter, PlayerFilter
-from api.models import TezosUser, GameSession, Token, Boss, Drop, Achievement, UserAchievement
+from api.filters import DropGameIDFilter, DropPlayerFilter, PlayerFilter, BeforeIdFilter
+from api.models import (TezosUser, GameSession, Token, Boss, Drop, Achievement, UserAchievement, ArchivedGameSession,
+                        ArchivedDrop, TransferMismatch, SessionReview)
 
 
-class DropAdmin(admin.ModelAdmin):
+def estimated_row_count(model):
+    """Row count from the planner statistics on PostgreSQL, the highest id elsewhere."""
+    using = router.db_for_read(model)
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        return row[0] if row is not None and row[0] >= 0 else None
+    return model._default_manager.using(using).aggregate(max_id=Max('pk'))['max_id'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids COUNT(*) over whole tables: an unfiltered changelist shows the estimated row count once the table
+    is larger than ADMIN_EXACT_COUNT_LIMIT, a filtered one counts at most that many rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:settings.ADMIN_EXACT_COUNT_LIMIT].count()
+
+
+class KeysetChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        # Offsets get slow deep into big tables; `before_id` continues after the last row of this page instead.
+        self.keyset_next_url = None
+        if self.result_list and ORDER_VAR not in self.params:
+            self.keyset_next_url = self.get_query_string({BeforeIdFilter.parameter_name: self.result_list[-1].pk},
+                                                         [PAGE_VAR])
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-pk']
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class DropAdmin(ScalableModelAdmin):
     list_display = ['game_hash', 'game_player_address', 'boss_killed', 'dropped_token_name', 'transfer_date']
-    list_filter = [DropGameIDFilter, DropPlayerFilter, 'boss_killed', 'dropped_token__name']
+    list_filter = [DropGameIDFilter, DropPlayerFilter, 'boss_killed', 'dropped_token', BeforeIdFilter]
+    list_select_related = ['game__player', 'dropped_token']
+    raw_id_fields = ['game']
 
     @admin.display(ordering="game__creation_time")
     def game_hash(self, obj):
-        return obj.game.hash if obj.game is not None else ''
+        return obj.game.hash.hex if obj.game is not None else ''
 
     @admin.display(ordering="game__player__registration_date")
     def game_player_address(self, obj):
-        return obj.game.player.address if obj.game is not None else ''
+        return obj.game.player.address if obj.game is not None and obj.game.player is not None else ''
 
     @admin.display(ordering="dropped_token__token_id")
     def dropped_token_name(self, obj):
         return obj.dropped_token.name if obj.dropped_token else ''
 
 
-class GameSessionAdmin(admin.ModelAdmin):
-    list_display = ['hash', 'player', 'creation_time', 'status']
-    list_filter = [PlayerFilter, 'status']
+class GameSessionAdmin(ScalableModelAdmin):
+    list_display = ['game_hash', 'player', 'creation_time', 'status']
+    list_filter = [PlayerFilter, 'status', BeforeIdFilter]
+    list_select_related = ['player']
+    raw_id_fields = ['player']
+
+    @admin.display(description='hash', ordering='hash')
+    def game_hash(self, obj):
+        return obj.hash.hex
+
+
+class ReadOnlyAdminMixin:
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ArchivedGameSessionAdmin(ReadOnlyAdminMixin, GameSessionAdmin):
+    list_display = GameSessionAdmin.list_display + ['archived_at']
+
+
+class ArchivedDropAdmin(ReadOnlyAdminMixin, DropAdmin):
+    pass
+
+
+class TransferMismatchAdmin(ReadOnlyAdminMixin, ScalableModelAdmin):
+    list_display = ['operation_hash', 'kind', 'address', 'token_id', 'expected', 'found', 'level', 'detected_at']
+    list_filter = ['kind']
+    search_fields = ['=operation_hash', '=address']
+
+
+class SessionReviewAdmin(ScalableModelAdmin):
+    list_display = ['game', 'player', 'status', 'score_rate', 'kill_ratio', 'reason', 'detected_at', 'reviewed_at']
+    list_filter = ['status']
+    list_select_related = ['game__player', 'player']
+    readonly_fields = ['game', 'player', 'score_rate', 'kill_ratio', 'reason', 'detected_at', 'reviewed_at']
+    actions = ['clear', 'confirm']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Clear, release the drops for transfer')
+    def clear(self, request, queryset):
+        queryset.update(status=SessionReview.CLEARED, reviewed_at=timezone.now())
+
+    @admin.action(description='Confirm, keep the drops blocked')
+    def confirm(self, request, queryset):
+        queryset.update(status=SessionReview.CONFIRMED, reviewed_at=timezone.now())
 
 
 admin.site.register(TezosUser)
@@ -33,3 +141,7 @@ admin.site.register(Boss)
 admin.site.register(Drop, DropAdmin)
 admin.site.register(Achievement)
 admin.site.register(UserAchievement)
+admin.site.register(ArchivedGameSession, ArchivedGameSessionAdmin)
+admin.site.register(ArchivedDrop, ArchivedDropAdmin)
+admin.site.register(TransferMismatch, TransferMismatchAdmin)
+admin.site.register(SessionReview, SessionReviewAdmin)
@@ -0,0 +1,158 @@
+"""
+Batch detection of implausible ended games.
+
+Every ended game with an end time gets two metrics: score per second of active play, its length minus
+seconds_on_pause, and mobs killed per shot fired. Both are ratios with a long right tail, so they are compared
+on a log scale, with robust statistics, the median and the MAD scaled to a standard deviation, of the whole
+history and of the player's own games. A game is flagged when
+a metric lies more than `threshold` deviations above the global median, or, for players with at least
+`min_player_games` games, more than `threshold` deviations above the player's median and half as far above
+the global one.
+
+History is read in chunks of `chunk_size` rows into NumPy columns. A first pass by id keeps a uniform sample of
+at most `sample_size` games for the global statistics. A second pass reads the games ordered by player, so each
+chunk holds whole players, and computes all the player medians of a chunk with one sort. Flagged games get a
+SessionReview, which holds their drops back from transfer until it is cleared, see NOT_UNDER_REVIEW.
+"""
+import numpy
+from django.db.models import DurationField, ExpressionWrapper, F, Q
+
+from api.models import GameSession, SessionReview
+
+MAD_SCALE = 1.4826
+MIN_SPREAD = 1e-6
+MIN_VALUE = 1e-3
+METRICS = ('score_rate', 'kill_ratio')
+COLUMNS = ('id', 'player_id', 'duration', 'seconds_on_pause', 'score', 'shots_fired', 'mobs_killed')
+
+
+def ended_games():
+    return (GameSession.objects.filter(status=GameSession.ENDED, end_time__isnull=False, player__isnull=False)
+            .annotate(duration=ExpressionWrapper(F('end_time') - F('creation_time'), output_field=DurationField())))
+
+
+def load_chunk(rows):
+    ids, players, durations, pauses, scores, shots, kills = zip(*rows)
+    active_seconds = (numpy.array(durations, dtype='timedelta64[us]') / numpy.timedelta64(1, 's') -
+                      numpy.array(pauses, dtype=float))
+    return {
+        'id': numpy.array(ids, dtype=numpy.int64),
+        'player': numpy.array(players, dtype=numpy.int64),
+        'score_rate': numpy.array(scores, dtype=float) / numpy.maximum(active_seconds, 1),
+        'kill_ratio': numpy.array(kills, dtype=float) / numpy.maximum(numpy.array(shots, dtype=float), 1),
+    }
+
+
+def chunks_by_id(chunk_size):
+    last_id = 0
+    while rows := list(ended_games().filter(id__gt=last_id).order_by('id').values_list(*COLUMNS)[:chunk_size]):
+        yield load_chunk(rows)
+        last_id = rows[-1][0]
+
+
+def chunks_by_player(chunk_size):
+    """Chunks ordered by player and id; the games of the last player are held back until all of them are read."""
+    last_player, last_id, held = 0, 0, []
+    while True:
+        after = Q(player_id__gt=last_player) | Q(player_id=last_player, id__gt=last_id)
+        rows = list(ended_games().filter(after).order_by('player_id', 'id').values_list(*COLUMNS)[:chunk_size])
+        if len(rows) < chunk_size:
+            if held or rows:
+                yield load_chunk(held + rows)
+            return
+        last_id, last_player = rows[-1][0], rows[-1][1]
+        rows = held + rows
+        split = len(rows)
+        while split and rows[split - 1][1] == last_player:
+            split -= 1
+        held = rows[split:]
+        if split:
+            yield load_chunk(rows[:split])
+
+
+def log_scale(values):
+    return numpy.log(numpy.maximum(values, MIN_VALUE))
+
+
+def robust(values):
+    median = numpy.median(values, axis=0)
+    return median, numpy.maximum(numpy.median(numpy.abs(values - median), axis=0) * MAD_SCALE, MIN_SPREAD)
+
+
+def global_statistics(chunk_size, sample_size, rng):
+    """Median and spread of every metric over a uniform sample of the ended games, None without games."""
+    sample, keys = None, None
+    for chunk in chunks_by_id(chunk_size):
+        values = numpy.column_stack([log_scale(chunk[metric]) for metric in METRICS])
+        chunk_keys = rng.random(len(values))
+        if sample is not None:
+            values, chunk_keys = numpy.vstack([sample, values]), numpy.concatenate([keys, chunk_keys])
+        if len(chunk_keys) > sample_size:
+            keep = numpy.argpartition(chunk_keys, sample_size)[:sample_size]
+            values, chunk_keys = values[keep], chunk_keys[keep]
+        sample, keys = values, chunk_keys
+    return robust(sample) if sample is not None else None
+
+
+def group_medians(groups, values):
+    """Median of values over each run of equal sorted groups, repeated for every element, and the run sizes."""
+    order = numpy.lexsort((values, groups))
+    starts = numpy.flatnonzero(numpy.r_[True, groups[1:] != groups[:-1]])
+    counts = numpy.diff(numpy.r_[starts, len(groups)])
+    sorted_values = values[order]
+    medians = (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+    return numpy.repeat(medians, counts), numpy.repeat(counts, counts)
+
+
+def flag_chunk(chunk, statistics, threshold, min_player_games, since_id):
+    """Returns the SessionReview of every game of the chunk from since_id on that looks implausible."""
+    global_median, global_spread = statistics
+    flagged = numpy.zeros(len(chunk['id']), dtype=bool)
+    reasons = [[] for _ in range(len(flagged))]
+    for column, metric in enumerate(METRICS):
+        values = log_scale(chunk[metric])
+        global_z = (values - global_median[column]) / global_spread[column]
+        player_median, games = group_medians(chunk['player'], values)
+        player_mad, _ = group_medians(chunk['player'], numpy.abs(values - player_median))
+        player_z = (values - player_median) / numpy.maximum(player_mad * MAD_SCALE, MIN_SPREAD)
+        metric_flagged = (global_z > threshold) | ((games >= min_player_games) & (player_z > threshold) &
+                                                   (global_z > threshold / 2))
+        metric_flagged &= chunk['id'] >= since_id
+        for index in numpy.flatnonzero(metric_flagged):
+            reasons[index].append(f'{metric} {chunk[metric][index]:.3g}: global z {global_z[index]:.1f}, '
+                                  f'player z {min(player_z[index], 1e6):.1f}')
+        flagged |= metric_flagged
+
+    return [SessionReview(game_id=int(chunk['id'][index]), player_id=int(chunk['player'][index]),
+                          score_rate=float(chunk['score_rate'][index]), kill_ratio=float(chunk['kill_ratio'][index]),
+                          reason='; '.join(reasons[index])[:256])
+            for index in numpy.flatnonzero(flagged)]
+
+
+def detect(threshold, min_player_games, chunk_size=50000, sample_size=200000, since=None, rng=None):
+    """
+    Flags implausible games created since the given time, all of them when None, with statistics over the
+    whole history. Returns the numbers of games checked and of new reviews.
+    """
+    rng = rng if rng is not None else numpy.random.default_rng()
+    statistics = global_statistics(chunk_size, sample_size, rng)
+    if statistics is None:
+        return 0, 0
+    since_id = 0
+    if since is not None:
+        since_id = GameSession.objects.filter(creation_time__gte=since).order_by('id').values_list(
+            'id', flat=True).first()
+        if since_id is None:
+            return 0, 0
+
+    checked, created = 0, 0
+    for chunk in chunks_by_player(chunk_size):
+        checked += int(numpy.count_nonzero(chunk['id'] >= since_id))
+        reviews = flag_chunk(chunk, statistics, threshold, min_player_games, since_id)
+        if not reviews:
+            continue
+        reviewed = set(SessionReview.objects.filter(game_id__in=[review.game_id for review in reviews])
+                       .values_list('game_id', flat=True))
+        created += len(SessionReview.objects.bulk_create([review for review in reviews
+                                                          if review.game_id not in reviewed]))
+    return checked, created
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.core.checks import register
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from api import checks, metrics, profiling, reference, tracing
+        reference.connect_signals()
+        register(checks.check_events_backend)
+        connection_created.connect(metrics.install_db_instrumentation)
+        if settings.PROFILER_ENABLED:
+            connection_created.connect(profiling.install_db_instrumentation)
+        if settings.TRACING_ENABLED:
+            connection_created.connect(tracing.install_db_instrumentation)
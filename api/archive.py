@@ -0,0 +1,100 @@
+"""
+Moves settled history out of the tables the live endpoints query.
+
+A game is archived once it is ended or abandoned, older than the cutoff and none of its drops still waits
+for a transfer: every killed drop with a token is transferred. The pending armor drop of a player is moved
+to the next game by StartGame, so games holding it stay as well, and so do games with a flagged or confirmed
+SessionReview, which keeps the review next to its game. The game and all its drops are copied to
+ArchivedGameSession and ArchivedDrop and deleted in the same transaction, and the totals the player stats
+endpoint reads from ended games and killed drops are added to ArchivedPlayerStats.
+
+Batches are bounded by `batch_size` games; run one archiver at a time.
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from api.models import (TezosUser, GameSession, Drop, SessionReview, ArchivedGameSession, ArchivedDrop,
+                        ArchivedPlayerStats)
+from api.reference import reference_data
+
+GAME_FIELDS = ('id', 'hash', 'player_id', 'status', 'creation_time', 'pause_init_time', 'seconds_on_pause',
+               'score', 'favourite_weapon', 'shots_fired', 'mobs_killed', 'drop_seed', 'end_time')
+DROP_FIELDS = ('id', 'game_id', 'boss_id', 'boss_killed', 'dropped_token_id', 'transfer_date', 'operation_hash',
+               'reconciled_at')
+
+
+def archivable_games(cutoff):
+    unsettled_drops = Drop.objects.filter(game=OuterRef('pk'), boss_killed=True, dropped_token__isnull=False,
+                                          transfer_date=None)
+    games = (GameSession.objects.filter(status__in=[GameSession.ENDED, GameSession.ABANDONED],
+                                        creation_time__lt=cutoff)
+             .filter(Q(review=None) | Q(review__status=SessionReview.CLEARED))
+             .exclude(Exists(unsettled_drops)))
+    reference = reference_data()
+    try:
+        armor_token = reference.armor_token
+    except ObjectDoesNotExist:
+        armor_token = None
+    if reference.first_boss is not None and armor_token is not None:
+        armor_drops = Drop.objects.filter(game=OuterRef('pk'), boss=reference.first_boss, dropped_token=armor_token,
+                                          boss_killed=False)
+        games = games.exclude(Q(Exists(armor_drops)) & Q(player__armor_state=TezosUser.ARMOR_PENDING))
+    return games.order_by('pk')
+
+
+def archive_batch(cutoff, batch_size):
+    """Archives up to batch_size games created before cutoff, returns the numbers of games and drops moved."""
+    with transaction.atomic():
+        games = list(archivable_games(cutoff).select_for_update(of=('self',), skip_locked=True)[:batch_size])
+        if not games:
+            return 0, 0
+        drops = list(Drop.objects.filter(game__in=games).order_by('pk'))
+
+        ArchivedGameSession.objects.bulk_create([
+            ArchivedGameSession(**{field: getattr(game, field) for field in GAME_FIELDS}) for game in games
+        ])
+        ArchivedDrop.objects.bulk_create([
+            ArchivedDrop(**{field: getattr(drop, field) for field in DROP_FIELDS}) for drop in drops
+        ])
+        add_player_stats(games, drops)
+
+        Drop.objects.filter(pk__in=[drop.pk for drop in drops]).delete()
+        GameSession.objects.filter(pk__in=[game.pk for game in games]).delete()
+    return len(games), len(drops)
+
+
+def add_player_stats(games, drops):
+    player_by_game = {game.id: game.player_id for game in games}
+    totals = {}
+    for game in games:
+        if game.player_id is not None and game.status == GameSession.ENDED:
+            stats = totals.setdefault(game.player_id, ArchivedPlayerStats(player_id=game.player_id))
+            stats.best_score = game.score if stats.games_played == 0 else max(stats.best_score, game.score)
+            stats.games_played += 1
+            stats.mobs_killed += game.mobs_killed
+            stats.shots_fired += game.shots_fired
+    for drop in drops:
+        player_id = player_by_game[drop.game_id]
+        if player_id is not None and drop.boss_killed:
+            totals.setdefault(player_id, ArchivedPlayerStats(player_id=player_id)).bosses_killed += 1
+    if not totals:
+        return
+
+    existing = {stats.player_id: stats
+                for stats in ArchivedPlayerStats.objects.select_for_update().filter(player_id__in=list(totals))}
+    for player_id, added in totals.items():
+        stats = existing.get(player_id)
+        if stats is None:
+            continue
+        if added.games_played:
+            stats.best_score = added.best_score if stats.games_played == 0 else max(stats.best_score,
+                                                                                    added.best_score)
+        stats.games_played += added.games_played
+        stats.mobs_killed += added.mobs_killed
+        stats.shots_fired += added.shots_fired
+        stats.bosses_killed += added.bosses_killed
+    ArchivedPlayerStats.objects.bulk_update(list(existing.values()), ['games_played', 'best_score', 'mobs_killed',
+                                                                      'shots_fired', 'bosses_killed'])
+    ArchivedPlayerStats.objects.bulk_create([added for player_id, added in totals.items()
+                                             if player_id not in existing])
@@ -0,0 +1,36 @@
+"""
+SQLite backend tuned for serving concurrent game requests from several worker processes.
+
+Extra OPTIONS on top of the stock backend:
+    pragmas           -- mapping of PRAGMA name to value executed on every new connection.
+    transaction_mode  -- DEFERRED, IMMEDIATE or EXCLUSIVE, used to BEGIN atomic blocks. IMMEDIATE takes
+                         the write lock up front, so concurrent writers queue on busy_timeout instead of
+                         failing with "database is locked" when a read transaction upgrades to a write.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = (options.get('transaction_mode') or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'transaction_mode must be one of {", ".join(TRANSACTION_MODES)}.')
+
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.models import Boss, Token, Achievement
+from api.reference import bump_version, registry
+
+DEFAULT_BOSSES = [(1, 100.0), (2, 30.0), (3, 25.0), (4, 20.0), (5, 15.0)]
+DEFAULT_TOKENS = [('Armor', 5), ('Sword', 20), ('Shield', 25), ('Potion', 40), ('Helmet', 10)]
+
+
+def create_reference_data(bosses=len(DEFAULT_BOSSES), tokens=len(DEFAULT_TOKENS)):
+    if not Boss.objects.exists():
+        Boss.objects.bulk_create([
+            Boss(level=level, drop_chance=drop_chance) for level, drop_chance in DEFAULT_BOSSES[:bosses]
+        ])
+    if not Token.objects.exists():
+        Token.objects.bulk_create([
+            Token(name=name, value=value, token_id=settings.ARMOR_TOKEN_ID + index)
+            for index, (name, value) in enumerate(DEFAULT_TOKENS[:tokens])
+        ])
+    if not Achievement.objects.exists():
+        reward_token = Token.objects.order_by('token_id').last()
+        Achievement.objects.bulk_create([
+            Achievement(name='Kill 10 bosses', type=Achievement.KILL_BOSS, target_progress=10,
+                        reward_token=reward_token),
+            Achievement(name='Play 10 games', type=Achievement.PLAY_GAMES, target_progress=10,
+                        reward_token=reward_token),
+        ])
+    bump_version()
+
+
+@contextmanager
+def isolated_database(verbosity=0):
+    """
+    Runs the block against a freshly migrated throwaway database, so harnesses
+    never touch the configured one. SQLite gets a file instead of the shared
+    in-memory test database to allow concurrent connections from threads.
+    """
+    connection = connections['default']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    tmp_dir = None
+    if connection.vendor == 'sqlite' and not old_test_name:
+        tmp_dir = tempfile.mkdtemp(prefix='tezos_game_bench_')
+        test_settings['NAME'] = os.path.join(tmp_dir, 'bench.sqlite3')
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    mirrors = {alias: connections[alias].settings_dict['NAME'] for alias in connections
+               if connections[alias].settings_dict['TEST'].get('MIRROR') == 'default'}
+    for alias in mirrors:
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    registry.invalidate()
+    try:
+        yield connection
+    finally:
+        registry.invalidate()
+        connections.close_all()
+        for alias, name in mirrors.items():
+            connections[alias].settings_dict['NAME'] = name
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+        test_settings['NAME'] = old_test_name
+        if tmp_dir is not None:
+            for name in os.listdir(tmp_dir):
+                os.remove(os.path.join(tmp_dir, name))
+            os.rmdir(tmp_dir)
+
+
+class FakeCaptchaResponse:
+    text = json.dumps({'success': True})
+
+
+OPERATION_HASH = 'ootF1KoYWnJa9ets9BqmUgVomZNzQE2VDntck1jqzZ8nvXnZ9X7'
+
+
+class FakeContext:
+    def get_operations_ttl(self):
+        return 5
+
+
+class FakeShell:
+    def wait_operations(self, *args, **kwargs):
+        return [{'hash': OPERATION_HASH, 'contents': [
+            {'kind': 'transaction', 'metadata': {'operation_result': {'status': 'applied'}}}]}]
+
+
+class FakeTransaction:
+    """Stands in for a pytezos OperationGroup; the latency is spent on injection."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.context = FakeContext()
+        self.shell = FakeShell()
+
+    def autofill(self, *args, **kwargs):
+        return self
+
+    def sign(self):
+        return self
+
+    def inject(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return {'hash': OPERATION_HASH}
+
+
+class FakeContract:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def transfer(self, *args, **kwargs):
+        return FakeTransaction(self.latency)
+
+
+class FakeKey:
+    def public_key_hash(self):
+        return 'tz1VSUr8wwNhLAzempoch5d6hLRiTh8Cjcjb'
+
+
+class FakeTezosClient:
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.key = FakeKey()
+
+    def using(self, *args, **kwargs):
+        return self
+
+    def contract(self, address):
+        return FakeContract(self.latency)
+
+
+class FakeAsyncCaptchaClient:
+    latency = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def post(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return FakeCaptchaResponse()
+
+
+@contextmanager
+def stub_external_services(latency=0):
+    """Replaces the captcha HTTP calls and Tezos RPC with local fakes waiting `latency` seconds."""
+
+    def captcha_post(*args, **kwargs):
+        time.sleep(latency)
+        return FakeCaptchaResponse()
+
+    async_client = type('LatencyCaptchaClient', (FakeAsyncCaptchaClient,), {'latency': latency})
+    with mock.patch('requests.post', captcha_post), \
+            mock.patch('httpx.AsyncClient', async_client), \
+            mock.patch('pytezos.pytezos', FakeTezosClient(latency)):
+        yield
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, seconds, ok=True):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, elapsed):
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            result[name] = {
+                'count': len(values),
+                'errors': self.errors[name],
+                'rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+            }
+        return result
+
+
+def format_summary(summary):
+    header = f'{"endpoint":<32}{"count":>8}{"errors":>8}{"rps":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+    lines = [header, '-' * len(header)]
+    for name, row in summary.items():
+        lines.append(f'{name:<32}{row["count"]:>8}{row["errors"]:>8}{row["rps"]:>10}'
+                     f'{row["p50_ms"]:>10}{row["p95_ms"]:>10}{row["p99_ms"]:>10}')
+    return '\n'.join(lines)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Error
+from django.utils.module_loading import import_string
+
+
+def check_events_backend(app_configs, **kwargs):
+    from api.events import LocalBackend
+    if not settings.EVENTS_ENABLED or settings.WEB_WORKERS <= 1:
+        return []
+    if not issubclass(import_string(settings.EVENTS_BACKEND), LocalBackend):
+        return []
+    return [Error(
+        f'EVENTS_BACKEND {settings.EVENTS_BACKEND} only delivers events within one process, '
+        f'but WEB_WORKERS is {settings.WEB_WORKERS}.',
+        hint='Use api.events.PostgresBackend or run a single worker.',
+        id='api.E001',
+    )]
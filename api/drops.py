@@ -0,0 +1,59 @@
+"""
+Drop probability model: each boss drops with its own chance, the token is then picked by token drop chance.
+
+With LAZY_DROPS on, StartGame stores a drop seed on the game instead of writing Drop rows, and KillBoss
+derives the killed boss' drop from it. Every boss gets its own generator seeded from the game seed and the
+boss id, so the outcome does not depend on which other bosses were rolled or killed.
+
+`boss_drops()` and `token_index()` take plain floats as well as NumPy arrays, api.simulation rolls whole
+batches of games through them.
+"""
+import bisect
+import random
+
+
+def boss_drops(drop_chance, roll):
+    """Whether a boss with drop_chance (in percent) drops, for a roll uniform in [0, 1)."""
+    return roll * 100 <= drop_chance
+
+
+def token_index(token_thresholds, roll):
+    """Index of the dropped token for a roll uniform in [0, 1), `len(token_thresholds)` when none matches."""
+    value = (token_thresholds[-1] if len(token_thresholds) else 0) * roll
+    if isinstance(value, float):
+        return bisect.bisect_left(token_thresholds, value)
+    import numpy
+    return numpy.searchsorted(token_thresholds, value, side='left')
+
+
+def choose_token(reference, rng=random):
+    index = token_index(reference.token_thresholds, rng.random())
+    return reference.tokens[index] if index < len(reference.tokens) else None
+
+
+def roll_drops(bosses, reference, rng=random):
+    """Yields `(boss, token)` for every boss whose drop roll succeeds."""
+    for boss in bosses:
+        if boss_drops(boss.drop_chance, rng.random()):
+            yield boss, choose_token(reference, rng)
+
+
+def new_drop_seed(rng=random):
+    return rng.getrandbits(63)
+
+
+def seeded_drop(seed, boss, reference):
+    """Token the boss drops in the game with this drop seed, None when it drops nothing."""
+    for _, token in roll_drops([boss], reference, random.Random(f'{seed}:{boss.id}')):
+        return token
+    return None
+
+
+def seeded_drops(seed, bosses, reference):
+    """`(boss, token)` for every boss that drops something in the game with this drop seed."""
+    drops = []
+    for boss in bosses:
+        token = seeded_drop(seed, boss, reference)
+        if token is not None:
+            drops.append((boss, token))
+    return drops
@@ -0,0 +1,193 @@
+"""
+Push channel for player events: transfers, drop balance changes and achievement progress.
+
+Views call `publish(player_id, event, data)`; once the surrounding transaction commits, the event is handed to
+the backend configured by EVENTS_BACKEND. The backend delivers it to the in-process `broker` of every node,
+which puts it on the queue of each subscriber of that player, the `events/` endpoint streams these queues as
+Server-Sent Events. LocalBackend delivers straight to the broker of its own process, so it only fits a single
+worker process; PostgresBackend, the default on PostgreSQL, goes through LISTEN/NOTIFY so that any worker or
+node serving the player receives it. api.checks refuses LocalBackend with more than one WEB_WORKERS. With
+EVENTS_ENABLED off, publishing is a no-op.
+
+A subscriber whose queue fills up, a client that stopped reading, is dropped: its stream ends and the client
+reconnects and fetches the current state again.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, F
+from django.utils.module_loading import import_string
+
+from api.models import Drop, NOT_UNDER_REVIEW
+
+logger = logging.getLogger(__name__)
+
+TRANSFER = 'transfer'
+DROPS = 'drops'
+ACHIEVEMENT = 'achievement'
+
+
+class Subscription:
+    def __init__(self, player_id, queue_size):
+        self.player_id = player_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = False
+
+    def put(self, message):
+        if self.queue.full():
+            self.dropped = True
+        else:
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """The next message, None once the subscription was dropped; raises TimeoutError after timeout seconds."""
+        if self.dropped:
+            return None
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broker:
+    """Subscribers of this process by player id, safe to deliver to from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, player_id):
+        subscription = Subscription(player_id, settings.EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions[player_id].add(subscription)
+        get_backend().start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.player_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.player_id]
+
+    def deliver(self, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(message['player'], ()))
+        for subscription in subscriptions:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """Delivers to the subscribers of the publishing process only, for deployments with one worker process."""
+
+    def start(self):
+        pass
+
+    def publish(self, message):
+        broker.deliver(message)
+
+
+class PostgresBackend:
+    """
+    Sends every event with NOTIFY on the default database; each process LISTENs on a connection of its own
+    from its first subscriber on and delivers what it receives to its broker.
+    """
+
+    def __init__(self, channel='player_events', reconnect_seconds=5):
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def start(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='events-listener', daemon=True)
+                self.listener.start()
+
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, json.dumps(message, default=str)])
+
+    def listen(self):
+        import psycopg
+        from psycopg import sql
+        params = connections['default'].get_connection_params()
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as listen_connection:
+                    listen_connection.execute(sql.SQL('LISTEN {}').format(sql.Identifier(self.channel)))
+                    for notify in listen_connection.notifies():
+                        broker.deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception('Event listener disconnected')
+            time.sleep(self.reconnect_seconds)
+
+
+backend = None
+backend_lock = threading.Lock()
+
+
+def get_backend():
+    global backend
+    if backend is None:
+        with backend_lock:
+            if backend is None:
+                backend = import_string(settings.EVENTS_BACKEND)(**settings.EVENTS_BACKEND_OPTIONS)
+    return backend
+
+
+def publish(player_id, event, data):
+    if not settings.EVENTS_ENABLED or player_id is None:
+        return
+    message = {'player': player_id, 'event': event, 'data': data}
+    transaction.on_commit(lambda: send(message))
+
+
+def send(message):
+    # A lost event only costs the client a refetch, it must not fail the request that caused it.
+    try:
+        get_backend().publish(message)
+    except Exception:
+        logger.exception('Could not publish %s event', message['event'])
+
+
+def publish_drops(player_id, game_ids):
+    """Publishes the tokens the just ended or abandoned games add to the player's drop balance, if any."""
+    if not settings.EVENTS_ENABLED or not game_ids:
+        return
+    tokens = list(Drop.objects.filter(NOT_UNDER_REVIEW, game_id__in=game_ids, boss_killed=True,
+                                      dropped_token__isnull=False, transfer_date=None)
+                  .values(token_id=F('dropped_token__token_id')).annotate(amount=Count('id')).order_by())
+    if tokens:
+        publish(player_id, DROPS, {'tokens': tokens})
+
+
+def format_event(message):
+    return f'event: {message["event"]}\ndata: {json.dumps(message["data"], separators=(",", ":"), default=str)}\n\n'
+
+
+async def stream(subscription):
+    """Server-Sent Events of the subscription, with a comment every EVENTS_KEEPALIVE_SECONDS to keep proxies open."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message is None:
+                return
+            yield format_event(message)
+    finally:
+        broker.unsubscribe(subscription)
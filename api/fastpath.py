@@ -0,0 +1,91 @@
+"""
+Fast validation path for the game endpoints.
+
+With FAST_GAME_ENDPOINTS on, `game/start`, `game/pause`, `game/unpause`, `game/end` and `game/boss/kill`
+check the request body against a precompiled schema and load the game (or player) and boss with one query
+each, instead of building a serializer whose validators query the same rows several times. The schemas
+only accept plainly valid payloads; anything else, e.g. a numeric string for an integer, a missing game or a
+game in the wrong state, goes through the view's DRF serializer, so error responses are built exactly as before.
+"""
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+
+from api.models import TezosUser, GameSession
+from api.reference import reference_data
+
+MISSING = object()
+
+# (name, type, required, default, max_length), mirroring the serializer fields of each endpoint.
+GAME_ID = ('game_id', str, True, None, 32)
+ADDRESS_SCHEMA = (('address', str, True, None, 36),)
+GAME_SCHEMA = (GAME_ID,)
+END_GAME_SCHEMA = (GAME_ID, ('score', int, False, 0, None), ('favourite_weapon', str, False, None, None),
+                   ('shots_fired', int, False, 0, None), ('mobs_killed', int, False, 0, None))
+KILL_BOSS_SCHEMA = (GAME_ID, ('boss', int, True, None, None))
+
+
+def parse(schema, data):
+    """Returns the validated values of data, or None when it needs the full serializer."""
+    if type(data) is not dict:
+        return None
+    values = {}
+    for name, kind, required, default, max_length in schema:
+        value = data.get(name, MISSING)
+        if value is MISSING:
+            if required:
+                return None
+            values[name] = default
+            continue
+        if type(value) is not kind:
+            return None
+        if kind is str:
+            value = value.strip()
+            if not value or (max_length is not None and len(value) > max_length) or not value.isascii() or \
+                    '\x00' in value:
+                return None
+        values[name] = value
+    return values
+
+
+class FastGameValidationMixin:
+    """
+    Validates the request with `fast_schema` when FAST_GAME_ENDPOINTS is on, falling back to `serializer_class`.
+    `validate_request()` returns `(data, None)` or `(None, errors)`; data holds the validated fields plus the
+    `game` in one of `game_statuses`, or the signed `player` for endpoints taking an address, and the `boss`.
+    """
+    fast_schema = None
+    game_statuses = None
+
+    def validate_request(self):
+        if settings.FAST_GAME_ENDPOINTS:
+            data = parse(self.fast_schema, self.request.data)
+            if data is not None and self.load_objects(data):
+                return data, None
+
+        serializer = self.serializer_class(data=self.request.data)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        data = dict(serializer.validated_data)
+        if 'address' in data:
+            data['player'] = TezosUser.objects.get(address=data['address'])
+        if 'game_id' in data:
+            data['game'] = GameSession.objects.get(hash=data['game_id'])
+        if 'boss' in data:
+            data['boss'] = reference_data().get_boss(data['boss'])
+        return data, None
+
+    def load_objects(self, data):
+        try:
+            if 'address' in data:
+                from pytezos.crypto.encoding import is_address
+                if not is_address(data['address']):
+                    return False
+                data['player'] = TezosUser.objects.get(address=data['address'], success_sign=True)
+            if 'game_id' in data:
+                data['game'] = GameSession.objects.get(hash=data['game_id'], status__in=self.game_statuses)
+            if 'boss' in data:
+                data['boss'] = reference_data().get_boss(data['boss'])
+        except (ObjectDoesNotExist, ValidationError):
+            # ValidationError: a game_id that is not a hex UUID, the serializer reports it as not found.
+            return False
+        return True
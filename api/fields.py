@@ -0,0 +1,37 @@
+import uuid
+
+from django.db import models
+
+
+class CompactUUIDField(models.UUIDField):
+    """
+    UUID kept in 16 bytes: the native uuid type on PostgreSQL and raw bytes elsewhere, where UUIDField
+    falls back to 32 hex characters. Byte order matches the hex order, so prefix searches can use ranges.
+    """
+
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return 'uuid'
+        if connection.vendor == 'sqlite':
+            return 'blob'
+        return 'binary(16)'
+
+    def get_internal_type(self):
+        # Keeps the backends from applying their hex string converters to the raw bytes.
+        return 'BinaryField'
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        if connection.vendor == 'postgresql':
+            return value
+        return value.bytes
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
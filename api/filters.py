@@ -1,3 +1,5 @@
+import string
+
 from django.contrib import admin
 
 
@@ -23,8 +25,13 @@ class DropGameIDFilter(InputFilter):
 
     def queryset(self, request, queryset):
         if self.value() is not None:
-            game_hash = self.value()
-            return queryset.filter(game__hash__contains=game_hash)
+            game_hash = self.value().strip().lower()
+            if len(game_hash) > 32 or any(char not in string.hexdigits for char in game_hash):
+                return queryset.none()
+            if len(game_hash) == 32:
+                return queryset.filter(game__hash=game_hash)
+            # Hashes are stored as bytes in hex order, so a prefix is the range of its smallest and largest fill.
+            return queryset.filter(game__hash__range=(game_hash.ljust(32, '0'), game_hash.ljust(32, 'f')))
 
 
 class DropPlayerFilter(InputFilter):
@@ -33,8 +40,10 @@ class DropPlayerFilter(InputFilter):
 
     def queryset(self, request, queryset):
         if self.value() is not None:
-            address = self.value()
-            return queryset.filter(game__player__address__contains=address)
+            address = self.value().strip()
+            if len(address) == 36:
+                return queryset.filter(game__player__address=address)
+            return queryset.filter(game__player__address__startswith=address)
 
 
 class PlayerFilter(InputFilter):
@@ -43,5 +52,17 @@ class PlayerFilter(InputFilter):
 
     def queryset(self, request, queryset):
         if self.value() is not None:
-            address = self.value()
-            return queryset.filter(player__address__contains=address)
+            address = self.value().strip()
+            if len(address) == 36:
+                return queryset.filter(player__address=address)
+            return queryset.filter(player__address__startswith=address)
+
+
+class BeforeIdFilter(InputFilter):
+    """Keyset paging: shows rows older than the given id, the changelists link to the next page with it."""
+    parameter_name = 'before_id'
+    title = 'Older than id'
+
+    def queryset(self, request, queryset):
+        if self.value() is not None and self.value().isdigit():
+            return queryset.filter(pk__lt=int(self.value()))
@@ -1,16 +1,177 @@
+"""
+Structured, non-blocking logging.
+
+`NonBlockingHandler` only puts records on a bounded queue; a listener thread formats them with
+`JsonFormatter` and writes them out, so a burst of errors never makes the failing requests wait on
+the stream. `RouteSamplingFilter` and `RepeatedErrorFilter` thin out records carrying a `route`,
+such as the ones `LogBadRequestMiddleware` emits.
+"""
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 logger = logging.getLogger(__name__)
 
+RECORD_ATTRIBUTES = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+def truncate(value, max_length):
+    if len(value) <= max_length:
+        return value
+    return f'{value[:max_length]}... ({len(value) - max_length} more characters)'
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, max_length=2000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_length = max_length
+
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': truncate(record.getMessage(), self.max_length),
+        }
+        for key, value in record.__dict__.items():
+            if key in RECORD_ATTRIBUTES:
+                continue
+            if isinstance(value, (int, float, bool)) or value is None:
+                entry[key] = value
+            elif isinstance(value, (dict, list, tuple)):
+                serialized = json.dumps(value, default=str)
+                entry[key] = value if len(serialized) <= self.max_length else truncate(serialized, self.max_length)
+            else:
+                entry[key] = truncate(str(value), self.max_length)
+        if record.exc_info:
+            entry['exception'] = truncate(self.formatException(record.exc_info), self.max_length * 4)
+        elif record.exc_text:
+            entry['exception'] = truncate(record.exc_text, self.max_length * 4)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingHandler(QueueHandler):
+    """Hands records to a listener thread writing to stderr; records are dropped, and counted, when it falls behind."""
+
+    def __init__(self, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = logging.StreamHandler()
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def setFormatter(self, formatter):
+        super().setFormatter(formatter)
+        self.target.setFormatter(formatter)
+
+    def prepare(self, record):
+        # Like QueueHandler.prepare, the message and traceback are resolved on the calling thread, so the listener
+        # never reads args the caller may have changed since; the JSON formatting is left to the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        with self.dropped_lock:
+            if self.dropped:
+                record.dropped_records, self.dropped = self.dropped, 0
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+
+class RouteSamplingFilter(logging.Filter):
+    """Keeps the given share of the records of each route, e.g. `{'back/api/drop/get/': 0.1}`."""
+
+    def __init__(self, rates=None, default_rate=1.0):
+        super().__init__()
+        self.rates = rates or {}
+        self.default_rate = default_rate
+
+    def filter(self, record):
+        route = getattr(record, 'route', None)
+        if route is None:
+            return True
+        rate = self.rates.get(route, self.default_rate)
+        return rate >= 1 or random.random() < rate
+
+
+class RepeatedErrorFilter(logging.Filter):
+    """
+    Lets at most `limit` records with the same route, status and error fields through per `window` seconds.
+    The first record after a window reports how many were suppressed in `suppressed_records`.
+    """
+
+    def __init__(self, limit=10, window=60):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def filter(self, record):
+        route = getattr(record, 'route', None)
+        if route is None:
+            return True
+        data = getattr(record, 'data', None)
+        key = (route, getattr(record, 'status', None), tuple(sorted(data)) if isinstance(data, dict) else None)
+        now = time.monotonic()
+        with self.lock:
+            window_start, count, suppressed = self.counters.get(key, (now, 0, 0))
+            if now - window_start >= self.window:
+                if suppressed:
+                    record.suppressed_records = suppressed
+                window_start, count, suppressed = now, 0, 0
+            if count < self.limit:
+                self.counters[key] = (window_start, count + 1, suppressed)
+                return True
+            self.counters[key] = (window_start, count, suppressed + 1)
+            return False
+
 
 class LogBadRequestMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
+        self.log_response(request, response)
+        return response
 
-        if response.status_code != 200:
-            logger.error(f"Bad Request, path {request.path}\n{getattr(response, 'data', '')}")
-
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.log_response(request, response)
         return response
+
+    def log_response(self, request, response):
+        if response.status_code != 200:
+            resolver_match = getattr(request, 'resolver_match', None)
+            logger.error('Bad Request, path %s', request.path, extra={
+                'route': resolver_match.route if resolver_match is not None else 'unmatched',
+                'method': request.method,
+                'status': response.status_code,
+                'data': getattr(response, 'data', ''),
+            })
@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = ('Moves ended and abandoned games older than the given age whose drops are all settled, together with '
+            'their drops, to the archive tables in bounded batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+                            help='Games moved per transaction.')
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after this many batches, 0 for all.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to leave room for live traffic.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        total_games, total_drops, batches = 0, 0, 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            games, drops = archive_batch(cutoff, options['batch_size'])
+            if not games:
+                break
+            batches += 1
+            total_games += games
+            total_drops += drops
+            self.stdout.write(f'Batch {batches}: {games} games, {drops} drops archived')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'{total_games} games and {total_drops} drops archived '
+                                             f'in {batches} batches.'))
@@ -0,0 +1,109 @@
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from pytezos import Key
+
+from api.bench import (create_reference_data, isolated_database, stub_external_services, LatencyRecorder,
+                       format_summary)
+from api.models import TezosUser, GameSession, Boss, Token, Drop
+
+API_PREFIX = '/back/api/'
+
+
+def build_requests(addresses, count):
+    templates = [
+        ('post', 'captcha/verify/', lambda address: {'captcha': 'stub'}),
+        ('post', 'drop/transfer/', lambda address: {'captcha': 'stub', 'address': address}),
+        ('get', 'drop/get/', lambda address: {'address': address}),
+        ('get', 'achievements/get/', lambda address: {'address': address}),
+        ('get', 'player/stats/get/', lambda address: {'address': address}),
+        ('get', 'player/games/has-active/', lambda address: {'address': address}),
+    ]
+    combinations = itertools.cycle(itertools.product(addresses, templates))
+    return [(method, path, build(address)) for address, (method, path, build) in
+            itertools.islice(combinations, count)]
+
+
+class Command(BaseCommand):
+    help = ('Compares concurrent throughput of the I/O-bound endpoints served through the WSGI handler by a '
+            'fixed number of workers with the ASGI handler on one event loop, with captcha and RPC latency stubbed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=600)
+        parser.add_argument('--players', type=int, default=20)
+        parser.add_argument('--wsgi-workers', type=int, default=4,
+                            help='Requests the WSGI deployment serves at once, gunicorn sync workers.')
+        parser.add_argument('--concurrency', type=int, default=64, help='In-flight requests on the ASGI event loop.')
+        parser.add_argument('--stub-latency', type=float, default=0.05,
+                            help='Seconds every stubbed captcha/RPC call waits.')
+
+    def handle(self, *args, **options):
+        with isolated_database(), stub_external_services(options['stub_latency']):
+            create_reference_data()
+            addresses = self.create_players(options['players'])
+            requests = build_requests(addresses, options['requests'])
+
+            for mode, runner, concurrency in [('wsgi', self.run_wsgi, options['wsgi_workers']),
+                                              ('asgi', self.run_asgi, options['concurrency'])]:
+                self.create_pending_drops()
+                recorder = LatencyRecorder()
+                started = time.perf_counter()
+                runner(requests, recorder, concurrency)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'{mode}: {len(requests)} requests in {elapsed:.2f}s, {len(requests) / elapsed:.1f} requests/s '
+                    f'at concurrency {concurrency}'))
+                self.stdout.write(format_summary(recorder.summary(elapsed)))
+
+    def create_players(self, count):
+        addresses = [Key.generate(export=False).public_key_hash() for _ in range(count)]
+        TezosUser.objects.bulk_create([TezosUser(address=address, success_sign=True) for address in addresses])
+        return addresses
+
+    def create_pending_drops(self):
+        boss = Boss.objects.first()
+        token = Token.objects.first()
+        games = GameSession.objects.bulk_create([GameSession(player=player, status=GameSession.ENDED)
+                                                 for player in TezosUser.objects.all()])
+        Drop.objects.bulk_create([Drop(game=game, boss=boss, dropped_token=token, boss_killed=True) for game in games])
+
+    def run_wsgi(self, requests, recorder, concurrency):
+        def call(method, path, data):
+            client = Client()
+            started = time.perf_counter()
+            if method == 'get':
+                response = client.get(API_PREFIX + path, data)
+            else:
+                response = client.post(API_PREFIX + path, data, content_type='application/json')
+            recorder.record(path, time.perf_counter() - started, ok=response.status_code == 200)
+
+        def close_connections():
+            connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(call, *request) for request in requests]:
+                future.result()
+            for future in [executor.submit(close_connections) for _ in range(concurrency)]:
+                future.result()
+
+    def run_asgi(self, requests, recorder, concurrency):
+        async def call(client, semaphore, method, path, data):
+            async with semaphore:
+                started = time.perf_counter()
+                if method == 'get':
+                    response = await client.get(API_PREFIX + path, data)
+                else:
+                    response = await client.post(API_PREFIX + path, data, content_type='application/json')
+                recorder.record(path, time.perf_counter() - started, ok=response.status_code == 200)
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*[call(client, semaphore, *request) for request in requests])
+
+        asyncio.run(run())
@@ -0,0 +1,206 @@
+import io
+import json
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from pytezos import Key
+
+from api.bench import create_reference_data, isolated_database, stub_external_services
+from api.models import TezosUser, GameSession, Boss, Token, Drop, Achievement, UserAchievement
+from api.pagination import encode_cursor
+from api.reference import reference_data
+from api.utils import get_hex_payload, get_payload_for_sign
+
+API_PREFIX = '/back/api/'
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'endpoints.json'
+
+FIXTURE_SIZES = {
+    'small': {'players': 20, 'sessions': 5, 'history': 10},
+    'large': {'players': 200, 'sessions': 10, 'history': 200},
+}
+
+
+class EndpointCases:
+    """Request builders per endpoint; `setup_*` runs unmeasured before each call to prepare the state it needs."""
+
+    def __init__(self):
+        self.key = Key.generate(export=False)
+        self.address = self.key.public_key_hash()
+        self.player = TezosUser.objects.create(public_key=self.key.public_key(), address=self.address,
+                                               success_sign=True)
+        self.client = Client()
+
+    def create_history(self, sessions):
+        bosses = list(Boss.objects.all())
+        tokens = list(Token.objects.all())
+        games = GameSession.objects.bulk_create([
+            GameSession(player=self.player, status=GameSession.ENDED, score=index, mobs_killed=index,
+                        shots_fired=index * 3, favourite_weapon='ZOOKA') for index in range(sessions)
+        ])
+        Drop.objects.bulk_create([
+            Drop(game=game, boss=boss, dropped_token=tokens[index % len(tokens)], boss_killed=True,
+                 transfer_date=timezone.now() - timedelta(days=1) if index % 2 else None)
+            for index, game in enumerate(games) for boss in bosses
+        ])
+        UserAchievement.objects.bulk_create([
+            UserAchievement(player=self.player, achievement=achievement, current_progress=1)
+            for achievement in Achievement.objects.all()
+        ])
+
+    def start_game(self):
+        response = self.client.post(API_PREFIX + 'game/start/', {'address': self.address},
+                                    content_type='application/json')
+        return response.json()['response']['game_id']
+
+    def cases(self):
+        return {
+            'payload/get/': ('get', lambda: {'public_key': self.key.public_key()}),
+            'payload/verify/': ('post', self.setup_verify),
+            'captcha/verify/': ('post', lambda: {'captcha': 'stub'}),
+            'game/start/': ('post', lambda: {'address': self.address}),
+            'game/pause/': ('post', lambda: {'game_id': self.start_game()}),
+            'game/unpause/': ('post', self.setup_unpause),
+            'game/end/': ('post', lambda: {'game_id': self.start_game(), 'score': 10, 'favourite_weapon': 'ZOOKA',
+                                           'shots_fired': 10, 'mobs_killed': 10}),
+            'game/boss/kill/': ('post', lambda: {'game_id': self.start_game(), 'boss': Boss.objects.first().id}),
+            'drop/transfer/': ('post', self.setup_transfer),
+            'drop/get/': ('get', lambda: {'address': self.address}),
+            'achievements/get/': ('get', lambda: {'address': self.address}),
+            'player/stats/get/': ('get', lambda: {'address': self.address}),
+            'player/games/': ('get', self.setup_games_page),
+            'player/games/has-active/': ('get', lambda: {'address': self.address}),
+        }
+
+    def setup_games_page(self):
+        # Walks the pages of the player's history, deepest included, so the median covers all of them.
+        games = GameSession.objects.filter(player=self.player, status__in=[GameSession.ENDED, GameSession.ABANDONED])
+        self.games_offset = (getattr(self, 'games_offset', -20) + 20) % max(games.count(), 1)
+        if not self.games_offset:
+            return {'address': self.address}
+        last = games.order_by('-creation_time', '-id')[self.games_offset - 1]
+        return {'address': self.address, 'cursor': encode_cursor(last.creation_time, last.id)}
+
+    def setup_verify(self):
+        self.player.payload = get_payload_for_sign()
+        self.player.save()
+        return {'public_key': self.key.public_key(), 'signature': self.key.sign(get_hex_payload(self.player.payload))}
+
+    def setup_unpause(self):
+        game_id = self.start_game()
+        GameSession.objects.filter(hash=game_id).update(status=GameSession.PAUSED, pause_init_time=timezone.now())
+        return {'game_id': game_id}
+
+    def setup_transfer(self):
+        game = GameSession.objects.create(player=self.player, status=GameSession.ENDED)
+        Drop.objects.bulk_create([
+            Drop(game=game, boss=boss, dropped_token=Token.objects.first(), boss_killed=True)
+            for boss in Boss.objects.all()
+        ])
+        return {'captcha': 'stub', 'address': self.address}
+
+    def measure(self, path, method, build_data, repeat):
+        queries, timings = [], []
+        for iteration in range(repeat):
+            data = build_data()
+            random.seed(iteration)
+            with ExitStack() as stack:
+                # Reads routed to the replica run on its own connection, so both are counted.
+                captured = [stack.enter_context(CaptureQueriesContext(connections[alias]))
+                            for alias in ('default', settings.REPLICA_DATABASE) if alias in settings.DATABASES]
+                started = time.perf_counter()
+                if method == 'get':
+                    response = self.client.get(API_PREFIX + path, data)
+                else:
+                    response = self.client.post(API_PREFIX + path, data, content_type='application/json')
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'{path} responded with {response.status_code}: {response.content[:200]}')
+            queries.append(sum(len(context) for context in captured))
+        return {'queries': max(queries), 'time_ms': round(statistics.median(timings) * 1000, 3)}
+
+
+class Command(BaseCommand):
+    help = ('Measures query count and wall time of every API endpoint against fixed fixture sizes and fails '
+            'when either regresses past the checked-in baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(FIXTURE_SIZES), help='Comma separated fixture sizes.')
+        parser.add_argument('--endpoints', default=None, help='Comma separated endpoints, all by default.')
+        parser.add_argument('--repeat', type=int, default=20, help='Measured calls per endpoint.')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--time-tolerance', type=float, default=1.0,
+                            help='Allowed relative wall time growth over the baseline, 1.0 means twice as slow.')
+        parser.add_argument('--report', default=None, help='Write the JSON report to this file.')
+        parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run.')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes'].split(',')
+        unknown = [size for size in sizes if size not in FIXTURE_SIZES]
+        if unknown:
+            raise CommandError(f'Unknown fixture sizes: {", ".join(unknown)}.')
+
+        report = {}
+        for size in sizes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Fixture size: {size}'))
+            report[size] = self.run_size(FIXTURE_SIZES[size], options)
+
+        if options['report']:
+            with open(options['report'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+
+        if options['update_baseline']:
+            with open(options['baseline'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+                output.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {options["baseline"]}.'))
+            return
+
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = self.compare(report, baseline, options['time_tolerance'])
+        if regressions:
+            raise CommandError('Benchmark regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run_size(self, size, options):
+        results = {}
+        # The reference data is loaded once per process and its version checked once per interval, so the
+        # measured calls see a warm registry, as a long running worker does.
+        with isolated_database(), stub_external_services(), override_settings(REFERENCE_DATA_CHECK_SECONDS=3600):
+            create_reference_data()
+            call_command('generate_data', players=size['players'], sessions=size['sessions'], seed=0,
+                         stdout=io.StringIO())
+            reference_data()
+            cases = EndpointCases()
+            cases.create_history(size['history'])
+            selected = options['endpoints'].split(',') if options['endpoints'] else None
+            for path, (method, build_data) in cases.cases().items():
+                if selected is None or path in selected:
+                    results[path] = cases.measure(path, method, build_data, options['repeat'])
+                    self.stdout.write(f'{path:<32}{results[path]["queries"]:>6} queries'
+                                      f'{results[path]["time_ms"]:>12} ms')
+        return results
+
+    def compare(self, report, baseline, time_tolerance):
+        regressions = []
+        for size, endpoints in report.items():
+            for path, result in endpoints.items():
+                expected = baseline.get(size, {}).get(path)
+                if expected is None:
+                    continue
+                if result['queries'] > expected['queries']:
+                    regressions.append(f'[{size}] {path}: {result["queries"]} queries, '
+                                       f'baseline {expected["queries"]}')
+                if result['time_ms'] > expected['time_ms'] * (1 + time_tolerance):
+                    regressions.append(f'[{size}] {path}: {result["time_ms"]} ms, baseline {expected["time_ms"]} ms')
+        return regressions
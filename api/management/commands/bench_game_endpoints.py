@@ -0,0 +1,80 @@
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from pytezos import Key
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from rest_framework.views import APIView
+
+from api.bench import create_reference_data, isolated_database
+from api.models import TezosUser
+
+API_PREFIX = '/back/api/'
+ENDPOINTS = ('game/start/', 'game/pause/', 'game/unpause/', 'game/boss/kill/', 'game/end/')
+
+
+class Command(BaseCommand):
+    help = ('Plays games through the five game endpoints on a single thread, once with the DRF serializers and stock '
+            'JSON renderer/parser and once with the fast validation path and orjson, and reports requests per '
+            'second of CPU time, i.e. per core, for each endpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=300, help='Games played in each mode.')
+        parser.add_argument('--rounds', type=int, default=6,
+                            help='The modes alternate this many times, so both see the same table sizes.')
+        parser.add_argument('--players', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=30, help='Games played and discarded before measuring.')
+
+    def handle(self, *args, **options):
+        cpu_seconds = {'stock': dict.fromkeys(ENDPOINTS, 0.0), 'fast': dict.fromkeys(ENDPOINTS, 0.0)}
+        games_per_round = max(options['games'] // options['rounds'], 1)
+        with isolated_database():
+            create_reference_data()
+            addresses = [Key.generate(export=False).public_key_hash() for _ in range(options['players'])]
+            TezosUser.objects.bulk_create([TezosUser(address=address, success_sign=True) for address in addresses])
+
+            for round_number in range(options['rounds'] + 1):
+                for mode in ('stock', 'fast'):
+                    with ExitStack() as stack:
+                        stack.enter_context(override_settings(FAST_GAME_ENDPOINTS=mode == 'fast'))
+                        if mode == 'stock':
+                            stack.enter_context(mock.patch.object(APIView, 'renderer_classes',
+                                                                  [JSONRenderer, BrowsableAPIRenderer]))
+                            stack.enter_context(mock.patch.object(APIView, 'parser_classes',
+                                                                  [JSONParser, FormParser, MultiPartParser]))
+                        if round_number == 0:
+                            self.play(addresses, options['warmup'], dict.fromkeys(ENDPOINTS, 0.0))
+                        else:
+                            self.play(addresses, games_per_round, cpu_seconds[mode])
+
+        games = games_per_round * options['rounds']
+        self.stdout.write(f'{"endpoint":<20}{"stock rps/core":>16}{"fast rps/core":>16}{"speedup":>10}')
+        self.stdout.write('-' * 62)
+        for endpoint in ENDPOINTS + ('total',):
+            if endpoint == 'total':
+                stock = games * len(ENDPOINTS) / sum(cpu_seconds['stock'].values())
+                fast = games * len(ENDPOINTS) / sum(cpu_seconds['fast'].values())
+            else:
+                stock, fast = games / cpu_seconds['stock'][endpoint], games / cpu_seconds['fast'][endpoint]
+            self.stdout.write(f'{endpoint:<20}{stock:>16.1f}{fast:>16.1f}{fast / stock:>9.2f}x')
+
+    def play(self, addresses, games, cpu_seconds):
+        client = Client()
+
+        def post(endpoint, data):
+            started = time.process_time()
+            response = client.post(API_PREFIX + endpoint, data, content_type='application/json')
+            cpu_seconds[endpoint] += time.process_time() - started
+            if response.status_code != 200:
+                raise CommandError(f'{endpoint} responded with {response.status_code}: {response.content[:200]}')
+            return response.json()['response']
+
+        for index in range(games):
+            game_id = post('game/start/', {'address': addresses[index % len(addresses)]})['game_id']
+            post('game/pause/', {'game_id': game_id})
+            post('game/unpause/', {'game_id': game_id})
+            post('game/boss/kill/', {'game_id': game_id, 'boss': 1})
+            post('game/end/', {'game_id': game_id, 'score': index, 'shots_fired': 10, 'mobs_killed': 3})
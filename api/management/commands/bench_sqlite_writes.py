@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, OperationalError
+from django.test import Client
+from pytezos.crypto.encoding import base58_encode
+
+from api.bench import create_reference_data, isolated_database
+from api.models import TezosUser, Boss
+
+API_PREFIX = '/back/api/'
+
+PROFILES = {
+    'stock': {'timeout': 5},
+    'tuned': {'timeout': 5, 'transaction_mode': 'IMMEDIATE', 'pragmas': settings.SQLITE_PRAGMAS},
+}
+
+
+def write_worker(address, boss_id, duration, results):
+    connections.close_all()
+    client = Client()
+    games, errors = 0, 0
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                response = client.post(API_PREFIX + 'game/start/', {'address': address},
+                                       content_type='application/json')
+                game_id = response.json()['response']['game_id']
+                client.post(API_PREFIX + 'game/boss/kill/', {'game_id': game_id, 'boss': boss_id},
+                            content_type='application/json')
+                client.post(API_PREFIX + 'game/end/', {'game_id': game_id, 'score': 1},
+                            content_type='application/json')
+                games += 1
+            except OperationalError:
+                errors += 1
+    finally:
+        connections.close_all()
+        results.put((games, errors))
+
+
+class Command(BaseCommand):
+    help = ('Measures how StartGame/KillBoss/EndGame write throughput scales with the number of worker processes '
+            'sharing one SQLite file, for the stock and the tuned connection profile.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8', help='Comma separated worker process counts.')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds every run lasts.')
+        parser.add_argument('--profiles', default=','.join(PROFILES))
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+
+        worker_counts = [int(count) for count in options['workers'].split(',')]
+        self.stdout.write(f'{"profile":<10}{"workers":>8}{"games/s":>10}{"locked errors":>15}')
+        for profile in options['profiles'].split(','):
+            for workers in worker_counts:
+                games, errors = self.run(PROFILES[profile], workers, options['duration'])
+                self.stdout.write(f'{profile:<10}{workers:>8}{games / options["duration"]:>10.1f}{errors:>15}')
+
+    def run(self, profile_options, workers, duration):
+        settings_dict = connections['default'].settings_dict
+        old_options = settings_dict['OPTIONS']
+        settings_dict['OPTIONS'] = profile_options
+        try:
+            with isolated_database():
+                create_reference_data()
+                boss_id = Boss.objects.first().id
+                addresses = [base58_encode(os.urandom(20), b'tz1').decode() for _ in range(workers)]
+                TezosUser.objects.bulk_create([TezosUser(address=address, success_sign=True)
+                                               for address in addresses])
+                connections.close_all()
+
+                context = multiprocessing.get_context('fork')
+                results = context.Queue()
+                processes = [context.Process(target=write_worker, args=(address, boss_id, duration, results))
+                             for address in addresses]
+                for process in processes:
+                    process.start()
+                totals = [results.get() for _ in processes]
+                for process in processes:
+                    process.join()
+        finally:
+            settings_dict['OPTIONS'] = old_options
+        return sum(games for games, _ in totals), sum(errors for _, errors in totals)
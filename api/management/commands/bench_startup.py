@@ -0,0 +1,90 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'startup.json'
+
+# Imported on first use only; a worker loading any of them at boot is a regression.
+# `requests` is not listed because rest_framework.compat imports it on its own.
+LAZY_MODULES = ('pytezos', 'httpx')
+
+WSGI_LOAD = f'''
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tezos_game_back.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({{'seconds': time.perf_counter() - started,
+                  'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules]}}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Measures the wall time of `manage.py check` and of loading the WSGI application with its URLconf '
+            'in fresh interpreters, and fails when either regresses past the checked-in baseline or when the '
+            'application load imports a module that should be imported lazily.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--time-tolerance', type=float, default=0.5,
+                            help='Allowed relative wall time growth over the baseline, 0.5 means 1.5 times as slow.')
+        parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run.')
+
+    def handle(self, *args, **options):
+        check_times, wsgi_times, loaded = [], [], set()
+        for _ in range(options['repeat']):
+            check_times.append(self.time_check())
+            seconds, modules = self.time_wsgi_load()
+            wsgi_times.append(seconds)
+            loaded.update(modules)
+
+        report = {
+            'check_ms': round(statistics.median(check_times) * 1000, 1),
+            'wsgi_load_ms': round(statistics.median(wsgi_times) * 1000, 1),
+        }
+        self.stdout.write(f'manage.py check      {report["check_ms"]:>8} ms')
+        self.stdout.write(f'WSGI application     {report["wsgi_load_ms"]:>8} ms')
+
+        regressions = [f'{name} is imported while loading the WSGI application' for name in sorted(loaded)]
+        if options['update_baseline']:
+            if regressions:
+                raise CommandError('Not updating the baseline:\n' + '\n'.join(regressions))
+            with open(options['baseline'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {options["baseline"]}.'))
+            return
+
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+        for key, value in report.items():
+            if value > baseline[key] * (1 + options['time_tolerance']):
+                regressions.append(f'{key}: {value} ms, baseline {baseline[key]} ms')
+        if regressions:
+            raise CommandError('Startup regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def time_check(self):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, str(settings.BASE_DIR / 'manage.py'), 'check'],
+                                   capture_output=True, text=True)
+        seconds = time.perf_counter() - started
+        if completed.returncode != 0:
+            raise CommandError(f'manage.py check failed:\n{completed.stderr}')
+        return seconds
+
+    def time_wsgi_load(self):
+        completed = subprocess.run([sys.executable, '-c', WSGI_LOAD], capture_output=True, text=True,
+                                   cwd=settings.BASE_DIR, env=os.environ.copy())
+        if completed.returncode != 0:
+            raise CommandError(f'Loading the WSGI application failed:\n{completed.stderr}')
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        return result['seconds'], result['loaded']
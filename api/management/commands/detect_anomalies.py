@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+
+import numpy
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.anomalies import detect
+
+
+class Command(BaseCommand):
+    help = ('Flags ended games whose score per active second or kills per shot are outliers against the whole '
+            'history and the player\'s own games; their drops are held back from transfer until reviewed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since-days', type=float, default=None,
+                            help='Only flag games created in the last days, all games by default.')
+        parser.add_argument('--threshold', type=float, default=settings.ANOMALY_THRESHOLD,
+                            help='Robust standard deviations above the median that flag a game.')
+        parser.add_argument('--min-player-games', type=int, default=settings.ANOMALY_MIN_PLAYER_GAMES,
+                            help='Games a player needs before their own statistics are used.')
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Games read per query.')
+        parser.add_argument('--sample-size', type=int, default=200000,
+                            help='Games sampled for the global statistics.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since_days'] is not None:
+            since = timezone.now() - timedelta(days=options['since_days'])
+        started = time.perf_counter()
+        checked, flagged = detect(options['threshold'], options['min_player_games'], options['chunk_size'],
+                                  options['sample_size'], since, numpy.random.default_rng(options['seed']))
+        self.stdout.write(self.style.SUCCESS(f'{checked} games checked, {flagged} flagged for review '
+                                             f'in {time.perf_counter() - started:.2f}s.'))
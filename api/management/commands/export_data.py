@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.export import DATASETS, FORMATS, Encoder, iter_rows
+
+
+def parse_time(value):
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f'Invalid date and time: {value}.')
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class Command(BaseCommand):
+    help = ('Streams game sessions, drops or transfers, live and archived, as CSV or JSON lines ordered by id. '
+            'An interrupted export continues with --after-id set to the id of the last row written.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--since', default=None, help='ISO date and time, inclusive.')
+        parser.add_argument('--until', default=None, help='ISO date and time, exclusive.')
+        parser.add_argument('--after-id', type=int, default=0, help='Export rows with a larger id only.')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many rows.')
+        parser.add_argument('--output', default=None, help='Write to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        rows = iter_rows(options['dataset'], parse_time(options['since']), parse_time(options['until']),
+                         options['after_id'], options['limit'])
+        encoder = Encoder(options['dataset'], options['format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                for chunk in encoder.chunks(rows):
+                    output.write(chunk)
+        else:
+            for chunk in encoder.chunks(rows):
+                self.stdout.write(chunk, ending='')
+        if encoder.last_id is not None:
+            self.stderr.write(f'Last id: {encoder.last_id}')
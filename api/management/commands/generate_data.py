@@ -0,0 +1,133 @@
+import os
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from pytezos.crypto.encoding import base58_encode
+
+from api.bench import create_reference_data
+from api.models import TezosUser, GameSession, Boss, Token, Drop, Achievement, UserAchievement
+
+
+class Command(BaseCommand):
+    help = 'Generates synthetic players, game sessions, drops and achievements for load and capacity testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--sessions', type=int, default=20, help='Average game sessions per player.')
+        parser.add_argument('--days', type=int, default=30, help='Spread session creation time over this many days.')
+        parser.add_argument('--kill-rate', type=float, default=0.5, help='Chance that a dropped boss gets killed.')
+        parser.add_argument('--transfer-rate', type=float, default=0.7,
+                            help='Chance that a killed drop of a finished game is already transferred.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Players generated per transaction.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        create_reference_data()
+        self.bosses = list(Boss.objects.order_by('id'))
+        self.tokens = list(Token.objects.order_by('id'))
+        self.armor_token = next(token for token in self.tokens if token.token_id == settings.ARMOR_TOKEN_ID)
+        self.achievements = list(Achievement.objects.all())
+
+        created = {'players': 0, 'sessions': 0, 'drops': 0, 'achievements': 0}
+        remaining = options['players']
+        while remaining > 0:
+            batch = min(remaining, options['batch_size'])
+            with transaction.atomic():
+                for key, value in self.generate_batch(rng, batch, options).items():
+                    created[key] += value
+            remaining -= batch
+            self.stdout.write(f'{options["players"] - remaining}/{options["players"]} players generated')
+
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{value} {key}' for key, value in created.items()) + ' created.'))
+
+    def generate_batch(self, rng, players_count, options):
+        now = timezone.now()
+        players = TezosUser.objects.bulk_create([
+            TezosUser(address=base58_encode(os.urandom(20), b'tz1').decode(), success_sign=True)
+            for _ in range(players_count)
+        ])
+
+        games = []
+        creation_times = []
+        for player in players:
+            sessions_count = max(1, round(rng.gauss(options['sessions'], options['sessions'] / 3)))
+            start_times = sorted(now - timedelta(seconds=rng.uniform(0, options['days'] * 86400))
+                                 for _ in range(sessions_count))
+            for index, creation_time in enumerate(start_times):
+                if index == sessions_count - 1 and rng.random() < 0.2:
+                    game_status = GameSession.CREATED
+                else:
+                    game_status = GameSession.ENDED if rng.random() < 0.8 else GameSession.ABANDONED
+                game = GameSession(player=player, status=game_status)
+                creation_times.append(creation_time)
+                if game_status == GameSession.ENDED:
+                    game.mobs_killed = rng.randint(10, 500)
+                    game.shots_fired = game.mobs_killed * rng.randint(2, 10)
+                    game.score = game.mobs_killed * rng.randint(5, 20)
+                    game.favourite_weapon = rng.choice(['ZOOKA', 'BLASTER', 'SHOTGUN', 'LASER'])
+                    game.seconds_on_pause = rng.choice([0, 0, rng.randint(10, 300)])
+                    game.end_time = creation_time + timedelta(
+                        seconds=game.seconds_on_pause + game.mobs_killed * rng.uniform(1, 3))
+                elif game_status == GameSession.ABANDONED:
+                    game.end_time = creation_time + timedelta(seconds=rng.uniform(10, 1800))
+                games.append(game)
+
+        GameSession.objects.bulk_create(games)
+        # auto_now_add overrides creation_time on insert, bulk_update writes back the generated one.
+        for game, creation_time in zip(games, creation_times):
+            game.creation_time = creation_time
+        GameSession.objects.bulk_update(games, ['creation_time'], batch_size=options['batch_size'])
+
+        drops = []
+        kills_by_player = {}
+        games_by_player = {}
+        armor_dropped = set()
+        armor_killed = set()
+        for game in games:
+            games_by_player[game.player_id] = games_by_player.get(game.player_id, 0) + 1
+            finished = game.status in [GameSession.ENDED, GameSession.ABANDONED]
+            for boss in self.bosses:
+                if boss == self.bosses[0] and game.player_id not in armor_dropped:
+                    armor_dropped.add(game.player_id)
+                    token = self.armor_token
+                elif rng.random() * 100 <= boss.drop_chance:
+                    token = rng.choices(self.tokens, weights=[token.value for token in self.tokens])[0]
+                else:
+                    continue
+                killed = rng.random() < options['kill_rate']
+                if killed and token == self.armor_token and boss == self.bosses[0]:
+                    armor_killed.add(game.player_id)
+                transferred = killed and finished and rng.random() < options['transfer_rate']
+                if killed:
+                    kills_by_player[game.player_id] = kills_by_player.get(game.player_id, 0) + 1
+                drops.append(Drop(game=game, boss=boss, dropped_token=token, boss_killed=killed,
+                                  transfer_date=game.creation_time + timedelta(hours=1) if transferred else None))
+        Drop.objects.bulk_create(drops)
+
+        for player in players:
+            if player.id in armor_killed:
+                player.armor_state = TezosUser.ARMOR_KILLED
+            elif player.id in armor_dropped:
+                player.armor_state = TezosUser.ARMOR_PENDING
+        TezosUser.objects.bulk_update(players, ['armor_state'], batch_size=options['batch_size'])
+
+        user_achievements = []
+        for player in players:
+            for achievement in self.achievements:
+                if achievement.type == Achievement.KILL_BOSS:
+                    progress = kills_by_player.get(player.id, 0)
+                else:
+                    progress = games_by_player.get(player.id, 0)
+                user_achievements.append(UserAchievement(player=player, achievement=achievement,
+                                                         current_progress=min(progress,
+                                                                              achievement.target_progress)))
+        UserAchievement.objects.bulk_create(user_achievements)
+
+        return {'players': len(players), 'sessions': len(games), 'drops': len(drops),
+                'achievements': len(user_achievements)}
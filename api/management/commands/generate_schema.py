@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.schema import write_documents
+
+
+class Command(BaseCommand):
+    help = 'Generates the OpenAPI schema served at back/swagger/ and saves it as JSON and YAML.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.OPENAPI_SCHEMA_DIR,
+                            help='Directory to write schema.json and schema.yaml to.')
+
+    def handle(self, *args, **options):
+        for path in write_documents(options['output']):
+            self.stdout.write(f'Wrote {path}')
@@ -0,0 +1,100 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from pytezos import Key
+
+from api.bench import (create_reference_data, isolated_database, stub_external_services, LatencyRecorder,
+                       format_summary)
+from api.utils import get_hex_payload
+
+API_PREFIX = '/back/api/'
+
+
+class PlayerScenario:
+    def __init__(self, recorder, rounds):
+        self.recorder = recorder
+        self.rounds = rounds
+        self.client = Client()
+        self.key = Key.generate(export=False)
+        self.address = self.key.public_key_hash()
+
+    def call(self, method, path, data=None):
+        started = time.perf_counter()
+        if method == 'get':
+            response = self.client.get(API_PREFIX + path, data)
+        else:
+            response = self.client.post(API_PREFIX + path, data, content_type='application/json')
+        self.recorder.record(path, time.perf_counter() - started, ok=response.status_code == 200)
+        return response.json() if response.status_code == 200 else None
+
+    def run(self):
+        try:
+            payload = self.call('get', 'payload/get/', {'public_key': self.key.public_key()})
+            if payload is None:
+                return
+            signature = self.key.sign(get_hex_payload(payload['payload']))
+            self.call('post', 'payload/verify/', {'public_key': self.key.public_key(), 'signature': signature})
+            self.call('post', 'captcha/verify/', {'captcha': 'stub'})
+
+            for _ in range(self.rounds):
+                started = self.call('post', 'game/start/', {'address': self.address})
+                if started is None:
+                    continue
+                game_id = started['response']['game_id']
+                self.call('get', 'player/games/has-active/', {'address': self.address})
+                self.call('post', 'game/pause/', {'game_id': game_id})
+                self.call('post', 'game/unpause/', {'game_id': game_id})
+                for drop in started['response']['game_drop']:
+                    self.call('post', 'game/boss/kill/', {'game_id': game_id, 'boss': drop['boss']})
+                self.call('post', 'game/end/', {'game_id': game_id, 'score': 100, 'favourite_weapon': 'ZOOKA',
+                                                'shots_fired': 50, 'mobs_killed': 20})
+
+            self.call('get', 'drop/get/', {'address': self.address})
+            self.call('get', 'achievements/get/', {'address': self.address})
+            self.call('get', 'player/stats/get/', {'address': self.address})
+            self.call('post', 'drop/transfer/', {'captcha': 'stub', 'address': self.address})
+        finally:
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Drives the full API flow concurrently against a throwaway database with captcha and Tezos RPC '
+            'stubbed, and reports throughput and latency percentiles per endpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=50, help='Number of simulated players.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Players running at the same time.')
+        parser.add_argument('--rounds', type=int, default=3, help='Games played by every player.')
+        parser.add_argument('--stub-latency', type=float, default=0.0,
+                            help='Seconds every stubbed captcha/RPC call sleeps to emulate network I/O.')
+        parser.add_argument('--output', default=None, help='Write the JSON summary to this file.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('Concurrency must be positive.')
+
+        with isolated_database(), stub_external_services(options['stub_latency']):
+            create_reference_data()
+            recorder = LatencyRecorder()
+            scenarios = [PlayerScenario(recorder, options['rounds']) for _ in range(options['players'])]
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                for future in [executor.submit(scenario.run) for scenario in scenarios]:
+                    future.result()
+            elapsed = time.perf_counter() - started
+
+        summary = recorder.summary(elapsed)
+        total_requests = sum(row['count'] for row in summary.values())
+        self.stdout.write(format_summary(summary))
+        self.stdout.write(f'\n{total_requests} requests in {elapsed:.2f}s, '
+                          f'{total_requests / elapsed:.2f} requests/s at concurrency {options["concurrency"]}')
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'elapsed': elapsed, 'concurrency': options['concurrency'], 'endpoints': summary},
+                          output, indent=2)
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = 'Prints a signed token; requests sent with it in the X-Profile header are profiled.'
+
+    def handle(self, *args, **options):
+        if not settings.PROFILER_ENABLED:
+            self.stderr.write(self.style.WARNING('PROFILER_ENABLED is off, the token has no effect.'))
+        self.stdout.write(make_token())
+        self.stderr.write(f'Valid for {settings.PROFILER_TOKEN_MAX_AGE} seconds.')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.reconcile import reconcile
+
+
+class Command(BaseCommand):
+    help = ('Compares the token transfers of the contract in the blocks since the last run with the transferred '
+            'drops and reports mismatches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-level', type=int, default=None,
+                            help='Block to start after on the first run, the current head by default.')
+        parser.add_argument('--max-levels', type=int, default=None, help='Blocks read by this run at most.')
+        parser.add_argument('--page-size', type=int, default=500, help='Operations requested per indexer call.')
+        parser.add_argument('--sender', default=None,
+                            help='Address the service sends tokens from, derived from PRIVATE_KEY by default.')
+
+    def handle(self, *args, **options):
+        from_level, to_level, read, mismatches = reconcile(
+            sender=options['sender'], from_level=options['from_level'], max_levels=options['max_levels'],
+            page_size=options['page_size'])
+        for mismatch in mismatches:
+            self.stdout.write(f'{mismatch.get_kind_display()}: operation {mismatch.operation_hash}, '
+                              f'address {mismatch.address}, token {mismatch.token_id}, '
+                              f'expected {mismatch.expected}, found {mismatch.found}')
+        style = self.style.WARNING if mismatches else self.style.SUCCESS
+        self.stdout.write(style(f'Blocks {from_level + 1}-{to_level}: {read} operations read, '
+                                f'{len(mismatches)} mismatches.'))
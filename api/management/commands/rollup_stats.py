@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.rollups import roll_up
+
+
+class Command(BaseCommand):
+    help = ('Adds the games started and finished and the drops transferred since the last run to the daily '
+            'rollup tables read by stats/daily/; meant to be scheduled.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ROLLUP_BATCH_SIZE,
+                            help='Rows counted per transaction.')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop each stream after this many batches, 0 for all.')
+
+    def handle(self, *args, **options):
+        counted = roll_up(options['batch_size'], options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{rows} {name}' for name, rows in counted.items()) +
+                                             ' rows counted.'))
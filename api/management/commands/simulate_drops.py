@@ -0,0 +1,43 @@
+import time
+
+import numpy
+from django.core.management.base import BaseCommand
+
+from api.reference import reference_data
+from api.simulation import simulate
+
+
+class Command(BaseCommand):
+    help = ('Simulates the drops of the current bosses and tokens for many players and reports the expected '
+            'token emission per day and its variance.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=10000)
+        parser.add_argument('--sessions', type=int, default=20, help='Games per player per day.')
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--kill-rate', type=float, default=1.0,
+                            help='Chance that a boss holding a drop gets killed, 1 gives the upper bound.')
+        parser.add_argument('--mean-gap', type=float, default=90.0,
+                            help='Mean seconds between two game starts of a player.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Players simulated at once.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        reference = reference_data()
+        started = time.perf_counter()
+        emitted = simulate(reference, options['players'], options['sessions'], options['days'],
+                           kill_rate=options['kill_rate'], mean_gap=options['mean_gap'],
+                           batch_size=options['batch_size'], rng=numpy.random.default_rng(options['seed']))
+        elapsed = time.perf_counter() - started
+
+        games = options['players'] * options['sessions'] * options['days']
+        self.stdout.write(f'{games} games of {len(reference.bosses)} bosses simulated in {elapsed:.2f}s')
+        self.stdout.write(f'{"token":<30} {"per day":>12} {"variance":>14} {"std":>10}')
+        for token, per_day in zip(reference.tokens, emitted.T):
+            self.stdout.write(f'{f"{token.token_id} {token.name}":<30} {per_day.mean():>12.1f} '
+                              f'{per_day.var(ddof=1) if len(per_day) > 1 else 0:>14.1f} '
+                              f'{per_day.std(ddof=1) if len(per_day) > 1 else 0:>10.1f}')
+        total = emitted.sum(axis=1)
+        variance = total.var(ddof=1) if len(total) > 1 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {total.mean():.1f} tokens per day, variance {variance:.1f}, std {variance ** 0.5:.1f}'))
@@ -0,0 +1,202 @@
+"""
+In-process request metrics exposed in the Prometheus text format at `back/metrics/`.
+
+Every worker process keeps its own registry, so with several workers each scrape sees one process;
+run one scrape target per worker or put a single worker behind the metrics port.
+
+The endpoint is served to staff users and to scrapers sending `Authorization: Bearer <METRICS_TOKEN>`;
+everyone else gets a 403, and it is a 404 with METRICS_ENABLED off.
+"""
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('db_queries', 'db_seconds', 'outbound')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.outbound = {}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.responses = {}
+        self.db_queries = {}
+        self.db_seconds = {}
+        self.outbound = {}
+
+    def record(self, route, method, status_code, seconds, request_metrics):
+        with self.lock:
+            key = (route, method)
+            if key not in self.latency:
+                self.latency[key] = Histogram()
+            self.latency[key].observe(seconds)
+            response_key = (route, method, str(status_code))
+            self.responses[response_key] = self.responses.get(response_key, 0) + 1
+            self.db_queries[key] = self.db_queries.get(key, 0) + request_metrics.db_queries
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + request_metrics.db_seconds
+            for target, (calls, call_seconds) in request_metrics.outbound.items():
+                total_calls, total_seconds = self.outbound.get((route, target), (0, 0.0))
+                self.outbound[(route, target)] = (total_calls + calls, total_seconds + call_seconds)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines += ['# HELP http_request_duration_seconds Request latency by route.',
+                      '# TYPE http_request_duration_seconds histogram']
+            for (route, method), histogram in sorted(self.latency.items()):
+                labels = f'route="{escape(route)}",method="{escape(method)}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+            lines += ['# HELP http_responses_total Responses by route and status code.',
+                      '# TYPE http_responses_total counter']
+            for (route, method, status_code), count in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{route="{escape(route)}",method="{escape(method)}",'
+                             f'status="{status_code}"}} {count}')
+
+            lines += ['# HELP db_queries_total Database queries by route.', '# TYPE db_queries_total counter']
+            for (route, method), count in sorted(self.db_queries.items()):
+                lines.append(f'db_queries_total{{route="{escape(route)}",method="{escape(method)}"}} {count}')
+
+            lines += ['# HELP db_query_seconds_total Time spent in database queries by route.',
+                      '# TYPE db_query_seconds_total counter']
+            for (route, method), seconds in sorted(self.db_seconds.items()):
+                lines.append(f'db_query_seconds_total{{route="{escape(route)}",method="{escape(method)}"}} {seconds}')
+
+            lines += ['# HELP outbound_call_seconds Time spent in outbound calls by route and target.',
+                      '# TYPE outbound_call_seconds summary']
+            for (route, target), (calls, seconds) in sorted(self.outbound.items()):
+                labels = f'route="{escape(route)}",target="{target}"'
+                lines.append(f'outbound_call_seconds_sum{{{labels}}} {seconds}')
+                lines.append(f'outbound_call_seconds_count{{{labels}}} {calls}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    request_metrics = current_request.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.db_queries += 1
+        request_metrics.db_seconds += time.perf_counter() - started
+
+
+def install_db_instrumentation(sender, connection, **kwargs):
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+@contextmanager
+def outbound_call(target):
+    """Accounts the time of the wrapped call to an external service, e.g. `captcha` or `tezos`."""
+    request_metrics = current_request.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if request_metrics is not None:
+            calls, seconds = request_metrics.outbound.get(target, (0, 0.0))
+            request_metrics.outbound[target] = (calls + 1, seconds + time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        token = current_request.set(request_metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.record(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    def record(self, request, response, seconds, request_metrics):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.route if resolver_match is not None else 'unmatched'
+        registry.record(route, request.method, response.status_code, seconds, request_metrics)
+
+
+def can_scrape(request):
+    if request.user.is_active and request.user.is_staff:
+        return True
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return (bool(settings.METRICS_TOKEN) and scheme.lower() == 'bearer' and
+            hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()))
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,9 +1,23 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
 class DisableCSRFMiddleware(object):
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         setattr(request, '_dont_enforce_csrf_checks', True)
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request):
+        setattr(request, '_dont_enforce_csrf_checks', True)
+        response = await self.get_response(request)
+        return response
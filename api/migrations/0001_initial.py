@@ -1,6 +1,6 @@
 # Generated by Django 5.0 on 2023-12-11 19:06
 
-import api.models
+import api.utils
 import django.db.models.deletion
 from django.db import migrations, models
 
@@ -25,7 +25,7 @@ class Migration(migrations.Migration):
             name='GameSession',
             fields=[
                 ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('hash', models.CharField(default=api.models.get_uuid_hash, max_length=32, unique=True)),
+                ('hash', models.CharField(default=api.utils.get_uuid_hash, max_length=32, unique=True)),
                 ('status', models.PositiveSmallIntegerField(choices=[(0, 'Created'), (1, 'Ended'), (2, 'Abandoned')], default=0)),
                 ('player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.tezosuser')),
             ],
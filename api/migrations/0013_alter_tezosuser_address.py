@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_gamesession_favourite_weapon_gamesession_mobs_killed_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tezosuser',
+            name='address',
+            field=models.CharField(blank=True, db_index=True, max_length=36, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-19 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+NOT_DROPPED, PENDING, KILLED = 0, 1, 2
+
+
+def fill_armor_state(apps, schema_editor):
+    TezosUser = apps.get_model('api', 'TezosUser')
+    Boss = apps.get_model('api', 'Boss')
+    Token = apps.get_model('api', 'Token')
+    Drop = apps.get_model('api', 'Drop')
+    first_boss = Boss.objects.order_by('pk').first()
+    armor_token = Token.objects.filter(token_id=settings.ARMOR_TOKEN_ID).first()
+    if first_boss is None or armor_token is None:
+        return
+    armor_drops = Drop.objects.filter(boss=first_boss, dropped_token=armor_token, game__player__isnull=False)
+    TezosUser.objects.filter(id__in=armor_drops.values('game__player')).update(armor_state=PENDING)
+    TezosUser.objects.filter(id__in=armor_drops.filter(boss_killed=True).values('game__player')).update(
+        armor_state=KILLED)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_referencedataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tezosuser',
+            name='armor_state',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Not dropped'), (1, 'Pending'), (2, 'Killed')], default=0),
+        ),
+        migrations.RunPython(fill_armor_state, migrations.RunPython.noop),
+    ]
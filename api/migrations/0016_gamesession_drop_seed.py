@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_tezosuser_armor_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='drop_seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0 on 2026-10-19 15:16
+
+import uuid
+
+import api.fields
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+def copy_hashes(apps, schema_editor):
+    GameSession = apps.get_model('api', 'GameSession')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('UPDATE api_gamesession SET hash_uuid = hash::uuid')
+        return
+    last_id = 0
+    while True:
+        games = list(GameSession.objects.filter(id__gt=last_id).order_by('id').only('id', 'hash')[:BATCH_SIZE])
+        if not games:
+            break
+        for game in games:
+            game.hash_uuid = uuid.UUID(hex=game.hash)
+        GameSession.objects.bulk_update(games, ['hash_uuid'])
+        last_id = games[-1].id
+
+
+def copy_hashes_back(apps, schema_editor):
+    GameSession = apps.get_model('api', 'GameSession')
+    last_id = 0
+    while True:
+        games = list(GameSession.objects.filter(id__gt=last_id).order_by('id').only('id', 'hash_uuid')[:BATCH_SIZE])
+        if not games:
+            break
+        for game in games:
+            game.hash = game.hash_uuid.hex
+        GameSession.objects.bulk_update(games, ['hash'])
+        last_id = games[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_gamesession_drop_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='hash_uuid',
+            field=api.fields.CompactUUIDField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='gamesession',
+            name='hash',
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.RunPython(copy_hashes, copy_hashes_back),
+        migrations.RemoveField(
+            model_name='gamesession',
+            name='hash',
+        ),
+        migrations.RenameField(
+            model_name='gamesession',
+            old_name='hash_uuid',
+            new_name='hash',
+        ),
+        migrations.AlterField(
+            model_name='gamesession',
+            name='hash',
+            field=api.fields.CompactUUIDField(default=uuid.uuid4, unique=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-19 15:18
+
+import api.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_gamesession_binary_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedGameSession',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hash', api.fields.CompactUUIDField(unique=True)),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Created'), (1, 'Ended'), (2, 'Abandoned'), (3, 'Paused')])),
+                ('creation_time', models.DateTimeField()),
+                ('pause_init_time', models.DateTimeField(blank=True, null=True)),
+                ('seconds_on_pause', models.PositiveIntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('favourite_weapon', models.CharField(blank=True, max_length=64, null=True)),
+                ('shots_fired', models.IntegerField(default=0)),
+                ('mobs_killed', models.IntegerField(default=0)),
+                ('drop_seed', models.BigIntegerField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.tezosuser')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedDrop',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('boss_killed', models.BooleanField(default=False)),
+                ('transfer_date', models.DateTimeField(blank=True, null=True)),
+                ('boss', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.boss')),
+                ('dropped_token', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.token')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.archivedgamesession')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPlayerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('best_score', models.IntegerField(default=0)),
+                ('mobs_killed', models.BigIntegerField(default=0)),
+                ('shots_fired', models.BigIntegerField(default=0)),
+                ('bosses_killed', models.PositiveIntegerField(default=0)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archived_stats', to='api.tezosuser')),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedgamesession',
+            index=models.Index(fields=['player', 'creation_time', 'id'], name='archivedgame_player_history'),
+        ),
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['player', 'creation_time', 'id'], name='gamesession_player_history'),
+        ),
+    ]
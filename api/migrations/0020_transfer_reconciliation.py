@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-19 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_player_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contract', models.CharField(max_length=36, unique=True)),
+                ('level', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransferMismatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(0, 'Missing on chain'), (1, 'Unknown on chain'), (2, 'Amount mismatch')])),
+                ('operation_hash', models.CharField(db_index=True, max_length=51)),
+                ('address', models.CharField(blank=True, max_length=36, null=True)),
+                ('token_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('expected', models.PositiveIntegerField(default=0)),
+                ('found', models.PositiveIntegerField(default=0)),
+                ('level', models.PositiveIntegerField(blank=True, null=True)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archiveddrop',
+            name='operation_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=51, null=True),
+        ),
+        migrations.AddField(
+            model_name='archiveddrop',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='drop',
+            name='operation_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=51, null=True),
+        ),
+        migrations.AddField(
+            model_name='drop',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
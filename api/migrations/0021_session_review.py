@@ -0,0 +1,38 @@
+# Generated by Django 5.0 on 2026-10-19 15:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_transfer_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedgamesession',
+            name='end_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='end_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SessionReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Flagged'), (1, 'Cleared'), (2, 'Confirmed')], default=0)),
+                ('score_rate', models.FloatField(help_text='Score per second of active play.')),
+                ('kill_ratio', models.FloatField(help_text='Mobs killed per shot fired.')),
+                ('reason', models.CharField(max_length=256)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review', to='api.gamesession')),
+                ('player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.tezosuser')),
+            ],
+        ),
+    ]
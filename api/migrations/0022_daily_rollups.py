@@ -0,0 +1,73 @@
+# Generated by Django 5.0 on 2026-10-19 15:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_session_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivePlayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('games_started', models.PositiveIntegerField(default=0)),
+                ('games_ended', models.PositiveIntegerField(default=0)),
+                ('games_abandoned', models.PositiveIntegerField(default=0)),
+                ('active_players', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyTokenStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('token_id', models.PositiveIntegerField()),
+                ('dropped', models.PositiveIntegerField(default=0)),
+                ('transferred', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('last_time', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='drop',
+            index=models.Index(fields=['transfer_date', 'id'], name='drop_transfer_date'),
+        ),
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['end_time', 'id'], name='gamesession_end_time'),
+        ),
+        migrations.AddField(
+            model_name='dailyactiveplayer',
+            name='player',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.tezosuser'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailytokenstats',
+            constraint=models.UniqueConstraint(fields=('day', 'token_id'), name='dailytokenstats_day_token'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyactiveplayer',
+            constraint=models.UniqueConstraint(fields=('day', 'player'), name='dailyactiveplayer_day_player'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archiveddrop',
+            index=models.Index(fields=['transfer_date', 'id'], name='archiveddrop_transfer_date'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedgamesession',
+            index=models.Index(fields=['end_time', 'id'], name='archivedgame_end_time'),
+        ),
+    ]
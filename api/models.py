@@ -1,14 +1,28 @@
+import uuid
+
 from django.db import models
-from api.utils import get_payload_for_sign, get_uuid_hash, get_shortened_address
+from api.fields import CompactUUIDField
+from api.utils import get_payload_for_sign, get_shortened_address
 
 
 class TezosUser(models.Model):
-    address = models.CharField(max_length=36, blank=True, null=True)
+    ARMOR_NOT_DROPPED = 0
+    ARMOR_PENDING = 1
+    ARMOR_KILLED = 2
+    ARMOR_STATE = [
+        (ARMOR_NOT_DROPPED, "Not dropped"),
+        (ARMOR_PENDING, "Pending"),
+        (ARMOR_KILLED, "Killed"),
+    ]
+
+    address = models.CharField(max_length=36, blank=True, null=True, db_index=True)
     public_key = models.CharField(max_length=64, blank=True, null=True)
     payload = models.CharField(max_length=128, default=get_payload_for_sign)
     signature = models.CharField(max_length=128, blank=True, null=True)
     success_sign = models.BooleanField(default=False)
     registration_date = models.DateTimeField(auto_now_add=True)
+    # State of the first boss armor drop, kept by StartGame and KillBoss.
+    armor_state = models.PositiveSmallIntegerField(choices=ARMOR_STATE, default=ARMOR_NOT_DROPPED)
 
     def __str__(self):
         return get_shortened_address(self.address)
@@ -34,7 +48,7 @@ class GameSession(models.Model):
         (PAUSED, "Paused"),
     ]
 
-    hash = models.CharField(max_length=32, default=get_uuid_hash, unique=True)
+    hash = CompactUUIDField(default=uuid.uuid4, unique=True)
     player = models.ForeignKey(TezosUser, on_delete=models.SET_NULL, blank=True, null=True)
     status = models.PositiveSmallIntegerField(choices=GAME_STATUS, default=CREATED)
     creation_time = models.DateTimeField(auto_now_add=True)
@@ -44,6 +58,13 @@ class GameSession(models.Model):
     favourite_weapon = models.CharField(blank=True, null=True, max_length=64)
     shots_fired = models.IntegerField(default=0)
     mobs_killed = models.IntegerField(default=0)
+    # Set when drops are rolled lazily at kill time, see api.drops.
+    drop_seed = models.BigIntegerField(blank=True, null=True)
+    end_time = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['player', 'creation_time', 'id'], name='gamesession_player_history'),
+                   models.Index(fields=['end_time', 'id'], name='gamesession_end_time')]
 
     def __str__(self):
         return f'{self.creation_time} - {self.player}'
@@ -56,8 +77,12 @@ class Token(models.Model):
 
     @property
     def drop_chance(self):
-        all_tokens = Token.objects.all()
-        total_values = sum(token.value for token in all_tokens)
+        total_values = Token.objects.aggregate(total=models.Sum('value'))['total'] or 0
+        return self.drop_chance_of(total_values)
+
+    def drop_chance_of(self, total_values):
+        if not total_values:
+            return 0
         result = self.value * 100 / total_values
         return round(result, 2)
 
@@ -71,6 +96,12 @@ class Drop(models.Model):
     boss_killed = models.BooleanField(default=False)
     dropped_token = models.ForeignKey(Token, on_delete=models.SET_NULL, blank=True, null=True)
     transfer_date = models.DateTimeField(blank=True, null=True)
+    operation_hash = models.CharField(max_length=51, blank=True, null=True, db_index=True)
+    # Set once api.reconcile has compared the transfer with the chain, whatever the outcome.
+    reconciled_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['transfer_date', 'id'], name='drop_transfer_date')]
 
     @property
     def token_transfered(self):
@@ -107,3 +138,153 @@ class UserAchievement(models.Model):
 
     def __str__(self):
         return f'{self.player}: {self.achievement.name}, progress: {self.percent_progress}%'
+
+
+class ArchivedGameSession(models.Model):
+    """Finished game moved out of GameSession by api.archive, under its original id."""
+    id = models.BigIntegerField(primary_key=True)
+    hash = CompactUUIDField(unique=True)
+    player = models.ForeignKey(TezosUser, on_delete=models.SET_NULL, blank=True, null=True)
+    status = models.PositiveSmallIntegerField(choices=GameSession.GAME_STATUS)
+    creation_time = models.DateTimeField()
+    pause_init_time = models.DateTimeField(blank=True, null=True)
+    seconds_on_pause = models.PositiveIntegerField(default=0)
+    score = models.IntegerField(default=0)
+    favourite_weapon = models.CharField(blank=True, null=True, max_length=64)
+    shots_fired = models.IntegerField(default=0)
+    mobs_killed = models.IntegerField(default=0)
+    drop_seed = models.BigIntegerField(blank=True, null=True)
+    end_time = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['player', 'creation_time', 'id'], name='archivedgame_player_history'),
+                   models.Index(fields=['end_time', 'id'], name='archivedgame_end_time')]
+
+    def __str__(self):
+        return f'{self.creation_time} - {self.player}'
+
+
+class ArchivedDrop(models.Model):
+    """Settled drop of an archived game, under its original id."""
+    id = models.BigIntegerField(primary_key=True)
+    game = models.ForeignKey(ArchivedGameSession, on_delete=models.CASCADE)
+    boss = models.ForeignKey(Boss, on_delete=models.SET_NULL, blank=True, null=True)
+    boss_killed = models.BooleanField(default=False)
+    dropped_token = models.ForeignKey(Token, on_delete=models.SET_NULL, blank=True, null=True)
+    transfer_date = models.DateTimeField(blank=True, null=True)
+    operation_hash = models.CharField(max_length=51, blank=True, null=True, db_index=True)
+    reconciled_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['transfer_date', 'id'], name='archiveddrop_transfer_date')]
+
+    def __str__(self):
+        return f'{self.game}, {self.dropped_token}'
+
+
+class ArchivedPlayerStats(models.Model):
+    """Totals of a player's archived games, added to the live ones by the player stats endpoint."""
+    player = models.OneToOneField(TezosUser, on_delete=models.CASCADE, related_name='archived_stats')
+    games_played = models.PositiveIntegerField(default=0)
+    best_score = models.IntegerField(default=0)
+    mobs_killed = models.BigIntegerField(default=0)
+    shots_fired = models.BigIntegerField(default=0)
+    bosses_killed = models.PositiveIntegerField(default=0)
+
+
+class ReconciliationCursor(models.Model):
+    """Highest block whose transfers of the contract api.reconcile has compared with the local drops."""
+    contract = models.CharField(max_length=36, unique=True)
+    level = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class TransferMismatch(models.Model):
+    MISSING_ON_CHAIN = 0
+    UNKNOWN_ON_CHAIN = 1
+    AMOUNT_MISMATCH = 2
+    KINDS = [
+        (MISSING_ON_CHAIN, "Missing on chain"),
+        (UNKNOWN_ON_CHAIN, "Unknown on chain"),
+        (AMOUNT_MISMATCH, "Amount mismatch"),
+    ]
+    kind = models.PositiveSmallIntegerField(choices=KINDS)
+    operation_hash = models.CharField(max_length=51, db_index=True)
+    address = models.CharField(max_length=36, blank=True, null=True)
+    token_id = models.PositiveIntegerField(blank=True, null=True)
+    expected = models.PositiveIntegerField(default=0)
+    found = models.PositiveIntegerField(default=0)
+    level = models.PositiveIntegerField(blank=True, null=True)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.operation_hash}'
+
+
+class ReferenceDataVersion(models.Model):
+    """Single row stamp bumped whenever bosses, tokens or achievements change, see api.reference."""
+    version = models.PositiveBigIntegerField(default=0)
+
+
+class SessionReview(models.Model):
+    """Ended game whose metrics api.anomalies found implausible; its drops are not transferred unless cleared."""
+    FLAGGED = 0
+    CLEARED = 1
+    CONFIRMED = 2
+    STATUSES = [
+        (FLAGGED, "Flagged"),
+        (CLEARED, "Cleared"),
+        (CONFIRMED, "Confirmed"),
+    ]
+    game = models.OneToOneField(GameSession, on_delete=models.CASCADE, related_name='review')
+    player = models.ForeignKey(TezosUser, on_delete=models.SET_NULL, blank=True, null=True)
+    status = models.PositiveSmallIntegerField(choices=STATUSES, default=FLAGGED)
+    score_rate = models.FloatField(help_text='Score per second of active play.')
+    kill_ratio = models.FloatField(help_text='Mobs killed per shot fired.')
+    reason = models.CharField(max_length=256)
+    detected_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.game}: {self.reason}'
+
+
+class RollupWatermark(models.Model):
+    """Position up to which api.rollups has counted one stream of rows, by id or by (time, id)."""
+    name = models.CharField(max_length=32, unique=True)
+    last_time = models.DateTimeField(blank=True, null=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class DailyStats(models.Model):
+    day = models.DateField(unique=True)
+    games_started = models.PositiveIntegerField(default=0)
+    games_ended = models.PositiveIntegerField(default=0)
+    games_abandoned = models.PositiveIntegerField(default=0)
+    active_players = models.PositiveIntegerField(default=0)
+
+
+class DailyActivePlayer(models.Model):
+    """Players who started a game on the day, DailyStats.active_players counts them."""
+    day = models.DateField()
+    player = models.ForeignKey(TezosUser, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['day', 'player'], name='dailyactiveplayer_day_player')]
+
+
+class DailyTokenStats(models.Model):
+    """Tokens earned in games finished on the day and tokens transferred on the day."""
+    day = models.DateField()
+    token_id = models.PositiveIntegerField()
+    dropped = models.PositiveIntegerField(default=0)
+    transferred = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['day', 'token_id'], name='dailytokenstats_day_token')]
+
+
+# Drops of a game under review stay out of drop/get and drop/transfer until the review clears it.
+NOT_UNDER_REVIEW = models.Q(game__review=None) | models.Q(game__review__status=SessionReview.CLEARED)
@@ -0,0 +1,35 @@
+"""
+Keyset pagination over `(creation_time, id)`, newest first.
+
+The cursor names the last row of the previous page, so every page is an index range scan from that row on,
+whatever its depth; OFFSET would read and skip all the rows before it.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(creation_time, row_id):
+    return base64.urlsafe_b64encode(f'{creation_time.isoformat()}|{row_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns `(creation_time, id)`, raises ValueError for a malformed cursor."""
+    try:
+        creation_time, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        creation_time = datetime.fromisoformat(creation_time)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor.')
+    if creation_time.tzinfo is None or not row_id.isdigit():
+        raise ValueError('Invalid cursor.')
+    return creation_time, int(row_id)
+
+
+def after_cursor(queryset, cursor):
+    """Rows of queryset that come after the cursor in `-creation_time, -id` order."""
+    if cursor is not None:
+        creation_time, row_id = cursor
+        queryset = queryset.filter(Q(creation_time__lt=creation_time) | Q(creation_time=creation_time, id__lt=row_id))
+    return queryset.order_by('-creation_time', '-id')
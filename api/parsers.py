@@ -0,0 +1,33 @@
+import io
+import re
+
+from django.conf import settings
+from rest_framework import parsers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson reads integers wider than 64 bits as floats, the stock parser keeps them exact.
+LONG_NUMBER = re.compile(rb'\d{19}')
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    Parses UTF-8 bodies with orjson when it is installed. Bodies with long numbers, and anything orjson rejects,
+    are parsed by the stock parser, so malformed bodies get the same `JSON parse error - ...` messages as before.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        content = stream.read()
+        if LONG_NUMBER.search(content):
+            return super().parse(io.BytesIO(content), media_type, parser_context)
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(content), media_type, parser_context)
@@ -0,0 +1,148 @@
+"""
+Opt-in request profiler.
+
+With PROFILER_ENABLED a request is profiled when it carries a valid `X-Profile` token (see the
+`profile_token` management command) or falls into the PROFILER_SAMPLE_RATE sample. Every profile is
+saved to PROFILER_DIR as a cProfile `.prof` file, loadable by pstats, snakeviz or flameprof, next to a
+`.json` file with the route and the SQL it ran. Only the newest PROFILER_MAX_FILES profiles are kept.
+When PROFILER_ENABLED is off the middleware removes itself from the stack and no query hook is installed.
+"""
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+TOKEN_SALT = 'api.profiling'
+TOKEN_VALUE = 'profile'
+
+current_queries = ContextVar('profiled_queries', default=None)
+thread_state = threading.local()
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def token_is_valid(token):
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILER_TOKEN_MAX_AGE) == TOKEN_VALUE
+    except signing.BadSignature:
+        return False
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append({'sql': sql, 'params': repr(params), 'seconds': time.perf_counter() - started})
+
+
+def install_db_instrumentation(sender, connection, **kwargs):
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+class ProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILER_DIR)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profile, queries, token = self.start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(profile, token)
+        self.save(request, response, profile, queries, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        # cProfile follows one thread, so under ASGI the profile also covers whatever else the event loop
+        # runs while this request awaits, and misses ORM work done in sync_to_async threads.
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        profile, queries, token = self.start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(profile, token)
+        self.save(request, response, profile, queries, time.perf_counter() - started)
+        return response
+
+    def should_profile(self, request):
+        if getattr(thread_state, 'profiling', False):
+            return False
+        token = request.headers.get('X-Profile')
+        if token is not None and token_is_valid(token):
+            return True
+        return settings.PROFILER_SAMPLE_RATE > 0 and random.random() < settings.PROFILER_SAMPLE_RATE
+
+    def start(self):
+        thread_state.profiling = True
+        queries = []
+        token = current_queries.set(queries)
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile, queries, token
+
+    def stop(self, profile, token):
+        profile.disable()
+        current_queries.reset(token)
+        thread_state.profiling = False
+
+    def save(self, request, response, profile, queries, seconds):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.route if resolver_match is not None else 'unmatched'
+        name = f'{timezone.now():%Y%m%dT%H%M%S}-{re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")}-' \
+               f'{uuid.uuid4().hex[:8]}'
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.directory / f'{name}.prof')
+        with open(self.directory / f'{name}.json', 'w') as metadata:
+            json.dump({
+                'route': route,
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                'seconds': seconds,
+                'queries': queries,
+            }, metadata, indent=2)
+        self.prune()
+
+    def prune(self):
+        profiles = sorted(self.directory.glob('*.prof'), key=os.path.getmtime)
+        for path in profiles[:-settings.PROFILER_MAX_FILES]:
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
@@ -0,0 +1,187 @@
+"""
+Incremental reconciliation of transferred drops with the FA2 contract.
+
+Every run reads the `transfer` calls the service key made on the contract, from the block after the stored
+cursor up to the head minus RECONCILE_CONFIRMATIONS, in pages from the indexer configured by
+RECONCILE_INDEXER. Each page is compared in bulk with the drops, live and archived, recorded under the same
+operation hashes, counting tokens per (operation, address, token id). Differences become TransferMismatch
+rows, compared drops get `reconciled_at`, and, once the pass has caught up with the head, drops transferred
+more than RECONCILE_GRACE_SECONDS ago that no operation accounted for are reported as missing on chain. The
+cursor then moves to the last block read, so the next run only reads newer blocks.
+"""
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.metrics import outbound_call
+from api.models import Drop, ArchivedDrop, ReconciliationCursor, TransferMismatch
+
+
+class TzktIndexer:
+    """Reads the contract's applied transfer calls from a TzKT API."""
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def get(self, path, params=None):
+        import httpx
+        with outbound_call('indexer'):
+            response = httpx.get(f'{self.url}{path}', params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def head_level(self):
+        return self.get('/v1/head')['level']
+
+    def operations(self, contract, from_level, to_level, after_id, limit):
+        """Transfer calls in from_level < level <= to_level with an id above after_id, in id order."""
+        return self.get('/v1/operations/transactions', {
+            'target': contract,
+            'entrypoint': 'transfer',
+            'status': 'applied',
+            'level.gt': from_level,
+            'level.le': to_level,
+            'id.gt': after_id,
+            'sort.asc': 'id',
+            'limit': limit,
+            'select': 'id,level,hash,parameter',
+        })
+
+
+class FileIndexer:
+    """Serves operations in the TzKT format from a JSON lines file, for running reconciliation locally."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        with open(self.path) as operations_file:
+            return [json.loads(line) for line in operations_file if line.strip()]
+
+    def head_level(self):
+        return max((operation['level'] for operation in self.load()), default=0)
+
+    def operations(self, contract, from_level, to_level, after_id, limit):
+        operations = sorted((operation for operation in self.load()
+                             if from_level < operation['level'] <= to_level and operation['id'] > after_id),
+                            key=lambda operation: operation['id'])
+        return operations[:limit]
+
+
+def get_indexer():
+    return import_string(settings.RECONCILE_INDEXER)(**settings.RECONCILE_INDEXER_OPTIONS)
+
+
+def get_sender():
+    from pytezos import Key
+    return Key.from_encoded_key(settings.PRIVATE_KEY).public_key_hash()
+
+
+def chain_transfers(operations, sender):
+    """Tokens moved by sender, counted per `(operation hash, address, token id)`, and the level of each hash."""
+    counts, levels = Counter(), {}
+    for operation in operations:
+        for transfer in (operation.get('parameter') or {}).get('value') or []:
+            if transfer.get('from_') != sender:
+                continue
+            levels[operation['hash']] = operation['level']
+            for tx in transfer.get('txs', []):
+                counts[(operation['hash'], tx['to_'], int(tx['token_id']))] += int(tx['amount'])
+    return counts, levels
+
+
+def local_transfers(hashes):
+    counts = Counter()
+    for model in (Drop, ArchivedDrop):
+        rows = (model.objects.filter(operation_hash__in=hashes)
+                .values_list('operation_hash', 'game__player__address', 'dropped_token__token_id')
+                .annotate(amount=Count('id')).order_by())
+        for operation_hash, address, token_id, amount in rows:
+            counts[(operation_hash, address, token_id)] += amount
+    return counts
+
+
+def compare_page(operations, sender, now):
+    """Records the mismatches of one page of operations and marks their drops as reconciled."""
+    chain, levels = chain_transfers(operations, sender)
+    if not levels:
+        return []
+    local = local_transfers(list(levels))
+    mismatches = []
+    for key in chain.keys() | local.keys():
+        operation_hash, address, token_id = key
+        found, expected = chain.get(key, 0), local.get(key, 0)
+        if found == expected:
+            continue
+        mismatches.append(TransferMismatch(
+            kind=TransferMismatch.UNKNOWN_ON_CHAIN if not expected else TransferMismatch.AMOUNT_MISMATCH,
+            operation_hash=operation_hash, address=address, token_id=token_id, expected=expected, found=found,
+            level=levels.get(operation_hash)))
+    TransferMismatch.objects.bulk_create(mismatches)
+    for model in (Drop, ArchivedDrop):
+        model.objects.filter(operation_hash__in=list(levels), reconciled_at=None).update(reconciled_at=now)
+    return mismatches
+
+
+def report_missing(now):
+    """Reports drops whose operation was due on chain but never showed up, see RECONCILE_GRACE_SECONDS."""
+    due = now - timedelta(seconds=settings.RECONCILE_GRACE_SECONDS)
+    mismatches = []
+    for model in (Drop, ArchivedDrop):
+        unreconciled = model.objects.filter(operation_hash__isnull=False, reconciled_at=None, transfer_date__lt=due)
+        rows = (unreconciled.values_list('operation_hash', 'game__player__address', 'dropped_token__token_id')
+                .annotate(amount=Count('id')).order_by())
+        mismatches += [TransferMismatch(kind=TransferMismatch.MISSING_ON_CHAIN, operation_hash=operation_hash,
+                                        address=address, token_id=token_id, expected=amount, found=0)
+                       for operation_hash, address, token_id, amount in rows]
+        unreconciled.update(reconciled_at=now)
+    TransferMismatch.objects.bulk_create(mismatches)
+    return mismatches
+
+
+def reconcile(indexer=None, sender=None, from_level=None, max_levels=None, page_size=500):
+    """
+    Runs one incremental pass over at most max_levels blocks and returns `(from_level, to_level, operations
+    read, mismatches)`. Without a stored cursor the pass starts at from_level, or just records the current head
+    when that is None too. Missing transfers are only reported once the pass reaches the head.
+    """
+    indexer = indexer or get_indexer()
+    contract = settings.CONTRACT
+    cursor = ReconciliationCursor.objects.filter(contract=contract).first()
+    head_level = indexer.head_level() - settings.RECONCILE_CONFIRMATIONS
+    if cursor is None:
+        cursor = ReconciliationCursor(contract=contract, level=head_level if from_level is None else from_level)
+        if from_level is None:
+            cursor.save()
+            return cursor.level, cursor.level, 0, []
+    start_level = cursor.level
+    to_level = head_level if max_levels is None else min(head_level, start_level + max_levels)
+    if to_level <= start_level:
+        return start_level, start_level, 0, []
+
+    sender = sender or get_sender()
+    now = timezone.now()
+    mismatches, after_id, read = [], 0, 0
+    while True:
+        operations = indexer.operations(contract, start_level, to_level, after_id, page_size)
+        if operations:
+            with transaction.atomic():
+                mismatches += compare_page(operations, sender, now)
+            after_id = operations[-1]['id']
+            read += len(operations)
+        if len(operations) < page_size:
+            break
+
+    with transaction.atomic():
+        if to_level == head_level:
+            mismatches += report_missing(now)
+        cursor.level = to_level
+        cursor.save()
+    return start_level, to_level, read, mismatches
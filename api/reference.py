@@ -0,0 +1,110 @@
+"""
+In-process registry of the reference data: bosses, tokens and achievements.
+
+`reference_data()` returns a snapshot loaded once per process. Saving or deleting a Boss, Token or Achievement
+bumps the version stamp in ReferenceDataVersion; the saving process reloads right after the commit and the
+others notice the new version within REFERENCE_DATA_CHECK_SECONDS. Bulk operations send no signals, so code
+using `bulk_create`/`update` on these tables calls `bump_version()` itself.
+"""
+import threading
+import time
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+
+from api.models import Boss, Token, Achievement, ReferenceDataVersion
+
+
+class ReferenceData:
+    def __init__(self, version):
+        self.version = version
+        self.bosses = list(Boss.objects.order_by('pk'))
+        self.bosses_by_id = {boss.id: boss for boss in self.bosses}
+        self.tokens = list(Token.objects.order_by('pk'))
+        self.tokens_by_token_id = {token.token_id: token for token in self.tokens}
+        self.total_token_value = sum(token.value for token in self.tokens)
+        self.token_drop_chances = [token.drop_chance_of(self.total_token_value) for token in self.tokens]
+        self.token_thresholds = list(accumulate(self.token_drop_chances))
+        self.achievements = list(Achievement.objects.select_related('reward_token').order_by('pk'))
+
+    @property
+    def first_boss(self):
+        return self.bosses[0] if self.bosses else None
+
+    def get_boss(self, boss_id):
+        try:
+            return self.bosses_by_id[boss_id]
+        except KeyError:
+            raise Boss.DoesNotExist(f'Boss {boss_id} does not exist.')
+
+    def get_token(self, token_id):
+        try:
+            return self.tokens_by_token_id[token_id]
+        except KeyError:
+            raise Token.DoesNotExist(f'Token {token_id} does not exist.')
+
+    @property
+    def armor_token(self):
+        return self.get_token(settings.ARMOR_TOKEN_ID)
+
+    def get_achievement(self, achievement_type):
+        """Same contract as Achievement.objects.get(type=achievement_type)."""
+        matching = [achievement for achievement in self.achievements if achievement.type == achievement_type]
+        if not matching:
+            raise Achievement.DoesNotExist(f'No achievement of type {achievement_type}.')
+        if len(matching) > 1:
+            raise Achievement.MultipleObjectsReturned(f'{len(matching)} achievements of type {achievement_type}.')
+        return matching[0]
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = None
+        self.checked_at = 0.0
+
+    def get(self):
+        data = self.data
+        if data is not None and time.monotonic() - self.checked_at < settings.REFERENCE_DATA_CHECK_SECONDS:
+            return data
+        with self.lock:
+            if self.data is None or time.monotonic() - self.checked_at >= settings.REFERENCE_DATA_CHECK_SECONDS:
+                version = current_version()
+                if self.data is None or self.data.version != version:
+                    self.data = ReferenceData(version)
+                self.checked_at = time.monotonic()
+            return self.data
+
+    def invalidate(self):
+        self.data = None
+
+
+registry = Registry()
+
+
+def reference_data():
+    return registry.get()
+
+
+def current_version():
+    return ReferenceDataVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    if not ReferenceDataVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        ReferenceDataVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    transaction.on_commit(registry.invalidate)
+
+
+def reference_data_changed(sender, **kwargs):
+    bump_version()
+
+
+def connect_signals():
+    for model in (Boss, Token, Achievement):
+        post_save.connect(reference_data_changed, sender=model, dispatch_uid=f'reference_data_{model.__name__}_save')
+        post_delete.connect(reference_data_changed, sender=model,
+                            dispatch_uid=f'reference_data_{model.__name__}_delete')
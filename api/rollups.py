@@ -0,0 +1,187 @@
+"""
+Daily rollups for the operational dashboards, filled incrementally by the rollup_stats command.
+
+Three streams of rows are counted, each from its own RollupWatermark on:
+- started games, by id: `games_started`, and the players active on the day a game started;
+- finished games, by (end_time, id): `games_ended` or `games_abandoned` on the day they stopped, and the
+  tokens of their killed drops as `dropped` on that day, when they join the drop/get balance;
+- transfers, by (transfer_date, id): `transferred` per token on the day of the transfer.
+
+Every stream reads the live and the archived tables, api.archive moves rows between them under their ids, so
+a rollup that starts after or falls behind an archive run still counts everything. Each table is read after
+the previous one, so a row archived in between can show up in both but never in none; rows are counted once
+per id. Games that finished before GameSession.end_time existed have none: the started stream counts them as
+ended or abandoned, with their drops, on the day they started.
+
+Every row is final once counted: a game starts and stops once and a drop is transferred once. Rows younger
+than ROLLUP_LAG_SECONDS wait for the next run, so a transaction committing late cannot land below a watermark.
+A batch adds its counts and moves its watermark in one transaction. Days are local dates in TIME_ZONE.
+Run one rollup at a time.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import takewhile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import (GameSession, Drop, ArchivedGameSession, ArchivedDrop, RollupWatermark, DailyStats,
+                        DailyActivePlayer, DailyTokenStats)
+
+GAMES = (GameSession, ArchivedGameSession)
+DROPS = (Drop, ArchivedDrop)
+FINISHED_STATUSES = (GameSession.ENDED, GameSession.ABANDONED)
+
+STARTED = 'started'
+FINISHED = 'finished'
+TRANSFERS = 'transfers'
+
+
+def get_watermark(name):
+    RollupWatermark.objects.get_or_create(name=name)
+    return RollupWatermark.objects.select_for_update().get(name=name)
+
+
+def after(watermark, time_field):
+    if watermark.last_time is None:
+        return Q()
+    return (Q(**{f'{time_field}__gt': watermark.last_time}) |
+            Q(**{time_field: watermark.last_time, 'id__gt': watermark.last_id}))
+
+
+def first_rows(models, condition, order, fields, batch_size):
+    """
+    The first batch_size rows by order of the tables of models, as dicts of fields, once per id. A row moved
+    by the archiver between two reads is found twice and kept once.
+    """
+    rows = {}
+    for model in models:
+        for row in model.objects.filter(condition).order_by(*order).values('id', *fields)[:batch_size]:
+            rows.setdefault(row['id'], row)
+    return sorted(rows.values(), key=lambda row: [row[field] for field in order])[:batch_size]
+
+
+def add_counts(model, keys, counts):
+    """Adds `counts`, `{key values: Counter(field=amount)}`, to the rows of model identified by the keys fields."""
+    if not counts:
+        return
+    existing = {tuple(getattr(row, key) for key in keys): row
+                for row in model.objects.select_for_update().filter(day__in={key[0] for key in counts})}
+    changed, created = [], []
+    for key, amounts in counts.items():
+        row = existing.get(key)
+        if row is None:
+            row = model(**dict(zip(keys, key)))
+            created.append(row)
+        else:
+            changed.append(row)
+        for field, amount in amounts.items():
+            setattr(row, field, getattr(row, field) + amount)
+    model.objects.bulk_update(changed, sorted({field for amounts in counts.values() for field in amounts}))
+    model.objects.bulk_create(created)
+
+
+def finished_counter(game_status):
+    return 'games_ended' if game_status == GameSession.ENDED else 'games_abandoned'
+
+
+def add_dropped(game_days):
+    """Counts the tokens of the killed drops of the games, `{game id: day}`, as dropped on the day of their game."""
+    if not game_days:
+        return
+    drops = {}
+    for model in DROPS:
+        rows = (model.objects.filter(game_id__in=list(game_days), boss_killed=True, dropped_token__isnull=False)
+                .values_list('id', 'game_id', 'dropped_token__token_id'))
+        for drop_id, game_id, token_id in rows:
+            drops[drop_id] = (game_days[game_id], token_id)
+    token_counts = defaultdict(Counter)
+    for key in drops.values():
+        token_counts[key]['dropped'] += 1
+    add_counts(DailyTokenStats, ('day', 'token_id'), token_counts)
+
+
+def roll_started(batch_size, until):
+    with transaction.atomic():
+        watermark = get_watermark(STARTED)
+        rows = first_rows(GAMES, Q(id__gt=watermark.last_id), ('id',),
+                          ('creation_time', 'player_id', 'status', 'end_time'), batch_size)
+        rows = list(takewhile(lambda row: row['creation_time'] < until, rows))
+        if not rows:
+            return 0
+        counts = defaultdict(Counter)
+        players = set()
+        legacy_days = {}
+        for row in rows:
+            day = timezone.localdate(row['creation_time'])
+            counts[(day,)]['games_started'] += 1
+            if row['player_id'] is not None:
+                players.add((day, row['player_id']))
+            if row['end_time'] is None and row['status'] in FINISHED_STATUSES:
+                counts[(day,)][finished_counter(row['status'])] += 1
+                legacy_days[row['id']] = day
+        add_counts(DailyStats, ('day',), counts)
+        add_dropped(legacy_days)
+        DailyActivePlayer.objects.bulk_create([DailyActivePlayer(day=day, player_id=player_id)
+                                               for day, player_id in players], ignore_conflicts=True)
+        active = (DailyActivePlayer.objects.filter(day__in=[day for day, in counts])
+                  .values_list('day').annotate(players=Count('id')).order_by())
+        for day, players_count in active:
+            DailyStats.objects.filter(day=day).update(active_players=players_count)
+        watermark.last_id = rows[-1]['id']
+        watermark.save()
+    return len(rows)
+
+
+def roll_finished(batch_size, until):
+    with transaction.atomic():
+        watermark = get_watermark(FINISHED)
+        rows = first_rows(GAMES, after(watermark, 'end_time') & Q(end_time__lt=until), ('end_time', 'id'),
+                          ('end_time', 'status'), batch_size)
+        if not rows:
+            return 0
+        counts = defaultdict(Counter)
+        days = {}
+        for row in rows:
+            days[row['id']] = timezone.localdate(row['end_time'])
+            counts[(days[row['id']],)][finished_counter(row['status'])] += 1
+        add_counts(DailyStats, ('day',), counts)
+        add_dropped(days)
+        watermark.last_time, watermark.last_id = rows[-1]['end_time'], rows[-1]['id']
+        watermark.save()
+    return len(rows)
+
+
+def roll_transfers(batch_size, until):
+    with transaction.atomic():
+        watermark = get_watermark(TRANSFERS)
+        rows = first_rows(DROPS, after(watermark, 'transfer_date') & Q(transfer_date__lt=until),
+                          ('transfer_date', 'id'), ('transfer_date', 'dropped_token__token_id'), batch_size)
+        if not rows:
+            return 0
+        token_counts = defaultdict(Counter)
+        for row in rows:
+            if row['dropped_token__token_id'] is not None:
+                token_counts[(timezone.localdate(row['transfer_date']), row['dropped_token__token_id'])][
+                    'transferred'] += 1
+        add_counts(DailyTokenStats, ('day', 'token_id'), token_counts)
+        watermark.last_time, watermark.last_id = rows[-1]['transfer_date'], rows[-1]['id']
+        watermark.save()
+    return len(rows)
+
+
+def roll_up(batch_size, max_batches=0):
+    """Counts every stream up to now minus ROLLUP_LAG_SECONDS, returns the rows counted per stream."""
+    until = timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    counted = {}
+    for name, roll in ((STARTED, roll_started), (FINISHED, roll_finished), (TRANSFERS, roll_transfers)):
+        counted[name], batches = 0, 0
+        while not max_batches or batches < max_batches:
+            rows = roll(batch_size, until)
+            counted[name] += rows
+            batches += 1
+            if rows < batch_size:
+                break
+    return counted
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads made inside `replica_reads()` to the replica alias when one is configured, everything else
+    goes to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_from_replica.get() and settings.REPLICA_DATABASE in settings.DATABASES:
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,87 @@
+"""
+Pre-generated OpenAPI schema.
+
+`manage.py generate_schema` writes the schema to OPENAPI_SCHEMA_DIR as `schema.json` and `schema.yaml`.
+Each process reads the artifact once, or generates the schema once if there is none, and serves it
+from memory with an ETag and a public Cache-Control. The Swagger UI page only points the browser at that
+`schema.json`, so opening the docs never rebuilds the schema.
+"""
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import SwaggerUIRenderer
+
+API_INFO = openapi.Info(
+    title="Tezos game API",
+    default_version='v1',
+    description="Api for Sample Tezos Game",
+)
+
+CODECS = {
+    'json': OpenAPICodecJson,
+    'yaml': OpenAPICodecYaml,
+}
+
+documents_lock = threading.Lock()
+documents = {}
+
+
+def generate_documents():
+    schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    return {format: codec_class(validators=[]).encode(schema) for format, codec_class in CODECS.items()}
+
+
+def write_documents(directory):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for format, content in generate_documents().items():
+        path = directory / f'schema.{format}'
+        path.write_bytes(content)
+        paths.append(path)
+    return paths
+
+
+def load_documents():
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    paths = {format: directory / f'schema.{format}' for format in CODECS}
+    if all(path.exists() for path in paths.values()):
+        contents = {format: path.read_bytes() for format, path in paths.items()}
+    else:
+        contents = generate_documents()
+    return {format: (content, f'"{hashlib.sha256(content).hexdigest()[:32]}"') for format, content in contents.items()}
+
+
+def get_document(format):
+    if not documents:
+        with documents_lock:
+            if not documents:
+                documents.update(load_documents())
+    return documents[format]
+
+
+def schema_document_view(request, format):
+    content, etag = get_document(format)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=CODECS[format].media_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_CACHE_SECONDS)
+    return response
+
+
+def swagger_ui_view(request):
+    renderer = SwaggerUIRenderer()
+    context = {'request': request}
+    renderer.set_context(context)
+    context.update(title=API_INFO.title, version=API_INFO._default_version)
+    return HttpResponse(render_to_string(renderer.template, context, request), content_type='text/html')
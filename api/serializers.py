@@ -1,9 +1,12 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 from api.utils import get_hex_payload
 from api.validators import *
 from api.models import Achievement, UserAchievement
 from rest_framework.exceptions import ValidationError
-from pytezos import Key
+from api.export import DATASETS, FORMATS
+from api.pagination import decode_cursor
 
 
 class GameHashField(serializers.CharField):
@@ -29,6 +32,37 @@ class CaptchaField(serializers.CharField):
         super().__init__(**kwargs)
 
 
+class AsyncValidationMixin:
+    """
+    Adds `ais_valid()`, which runs the regular field validation and then awaits `async_validators`,
+    a mapping of field name to async validators, reporting their errors the same way DRF does.
+    """
+    async_validators = {}
+
+    async def ais_valid(self):
+        valid = self.is_valid()
+        errors = dict(self.errors)
+        for field_name, validators in self.async_validators.items():
+            if field_name in errors:
+                continue
+            if valid:
+                value = self.validated_data[field_name]
+            else:
+                field = self.fields[field_name]
+                value = field.run_validation(field.get_value(self.initial_data))
+            for validator in validators:
+                try:
+                    await validator(value)
+                except ValidationError as error:
+                    errors[field_name] = error.detail
+                    break
+        if errors:
+            self._errors = {field_name: errors[field_name] for field_name in [*self.fields, 'non_field_errors']
+                            if field_name in errors}
+            self._validated_data = {}
+        return not errors
+
+
 class PublicKeySerializer(serializers.ModelSerializer):
     public_key = serializers.CharField(required=True, validators=[PublicKeyValidator()],
                                        help_text='Tezos address public key, can start with edpk')
@@ -46,6 +80,11 @@ class AddressSerializer(serializers.ModelSerializer):
         fields = ('address',)
 
 
+class AsyncAddressSerializer(AsyncValidationMixin, AddressSerializer):
+    address = AddressField()
+    async_validators = {'address': [AsyncSignedAddressValidator()]}
+
+
 class UserSignatureSerializer(PublicKeySerializer):
     signature = serializers.CharField(required=True, min_length=54, help_text='Signature value, can start with edsig')
 
@@ -53,6 +92,7 @@ class UserSignatureSerializer(PublicKeySerializer):
         fields = PublicKeySerializer.Meta.fields + ('signature',)
 
     def validate(self, data):
+        from pytezos import Key
         public_key = data.get('public_key')
         signature = data.get('signature')
         try:
@@ -69,8 +109,26 @@ class UserSignatureSerializer(PublicKeySerializer):
         return data
 
 
-class CaptchaSerializer(serializers.Serializer):
-    captcha = CaptchaField(validators=[CaptchaValidator()])
+class PlayerGamesSerializer(AsyncAddressSerializer):
+    cursor = serializers.CharField(required=False, default=None,
+                                   help_text='next_cursor of the previous page, omit for the latest games.')
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+    class Meta(AsyncAddressSerializer.Meta):
+        fields = AsyncAddressSerializer.Meta.fields + ('cursor', 'limit')
+
+    def validate_cursor(self, cursor):
+        if cursor is None:
+            return None
+        try:
+            return decode_cursor(cursor)
+        except ValueError as error:
+            raise ValidationError(error)
+
+
+class CaptchaSerializer(AsyncValidationMixin, serializers.Serializer):
+    captcha = CaptchaField()
+    async_validators = {'captcha': [AsyncCaptchaValidator()]}
 
 
 class GameHashSerializer(serializers.Serializer):
@@ -96,10 +154,10 @@ class EndGameSerializer(PausedOrActiveGameSerializer):
     mobs_killed = serializers.IntegerField(required=False, default=0)
 
 
-class TransferDropSerializer(serializers.Serializer):
-    # captcha = CaptchaField(validators=[CaptchaValidator()])
+class TransferDropSerializer(AsyncValidationMixin, serializers.Serializer):
     captcha = CaptchaField()
-    address = AddressField(validators=[SignedAddressValidator()])
+    address = AddressField()
+    async_validators = {'address': [AsyncSignedAddressValidator()]}
 
 
 class KillBossSerializer(ActiveGameSerializer):
@@ -121,3 +179,28 @@ class UserAchievementSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserAchievement
         fields = ('achievement', 'percent_progress')
+
+
+class ExportSerializer(serializers.Serializer):
+    dataset = serializers.ChoiceField(choices=list(DATASETS))
+    # Not `format`, DRF reads that query parameter to pick a renderer.
+    file_format = serializers.ChoiceField(choices=FORMATS, default='csv')
+    since = serializers.DateTimeField(required=False, default=None, help_text='Inclusive.')
+    until = serializers.DateTimeField(required=False, default=None, help_text='Exclusive.')
+    after_id = serializers.IntegerField(required=False, default=0, min_value=0,
+                                        help_text='Id of the last row already received, to resume an export.')
+    limit = serializers.IntegerField(required=False, default=None, min_value=1)
+
+
+class DailyStatsSerializer(serializers.Serializer):
+    since = serializers.DateField(required=True)
+    until = serializers.DateField(required=False, default=None, help_text='Inclusive, today by default.')
+
+    def validate(self, data):
+        if data['until'] is None:
+            data['until'] = timezone.localdate()
+        if data['until'] < data['since']:
+            raise ValidationError('until is before since.')
+        if (data['until'] - data['since']).days >= settings.ROLLUP_MAX_DAYS:
+            raise ValidationError(f'At most {settings.ROLLUP_MAX_DAYS} days at once.')
+        return data
@@ -0,0 +1,69 @@
+"""
+Monte Carlo simulation of the token emission of the drop model in api.drops, vectorized with NumPy.
+
+Every player plays `sessions` games a day, one burst starting at a random time of the day with exponential
+gaps of `mean_gap` seconds between game starts. As in StartGame, a game only rolls drops when at most
+MAX_GAMES_PER_MINUTE games of the player started in the minute before it, the first game drops the armor from
+the first boss, and the first boss only joins the rolls once the armor is killed. Each boss holding a drop is
+killed with `kill_rate`, a killed drop with a token is emitted. Without an armor token no armor is emitted.
+
+Players are simulated in batches of `batch_size`, so memory stays bounded by batch_size * sessions * bosses.
+"""
+import numpy
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+
+from api.drops import boss_drops, token_index
+
+SECONDS_PER_DAY = 86400
+
+
+def rate_limited(starts):
+    """Mask of the games that roll drops, for sorted game start times of shape (players, games)."""
+    players, games = starts.shape
+    # Rows are shifted apart so one searchsorted over the flattened array stays within each row.
+    shifted = starts + (numpy.arange(players) * (starts.max(initial=0) + 2 * SECONDS_PER_DAY))[:, None]
+    flat = shifted.ravel()
+    first_in_minute = numpy.searchsorted(flat, flat - 60, side='left').reshape(players, games)
+    position = numpy.arange(players * games).reshape(players, games)
+    return position - first_in_minute <= settings.MAX_GAMES_PER_MINUTE
+
+
+def simulate(reference, players, sessions, days, kill_rate=1.0, mean_gap=90.0, batch_size=10000, rng=None):
+    """Returns the tokens emitted per day and token, an array of shape (days, tokens) in `reference.tokens` order."""
+    rng = rng if rng is not None else numpy.random.default_rng()
+    drop_chances = numpy.array([boss.drop_chance for boss in reference.bosses], dtype=float)
+    token_thresholds = numpy.array(reference.token_thresholds, dtype=float)
+    tokens_count = len(reference.tokens)
+    try:
+        armor_index = reference.tokens.index(reference.armor_token)
+    except ObjectDoesNotExist:
+        armor_index = None
+    emitted = numpy.zeros((days, tokens_count), dtype=numpy.int64)
+    if not len(drop_chances) or not tokens_count:
+        return emitted
+
+    for batch_start in range(0, players, batch_size):
+        batch = min(batch_size, players - batch_start)
+        # Index of the game in which each player kills the armor, the first boss rolls in the games after it.
+        armor_killed_in = rng.geometric(kill_rate, batch) - 1 if kill_rate > 0 else numpy.full(batch, numpy.inf)
+        for day in range(days):
+            first_game = day * sessions
+            armor_day = (armor_killed_in >= first_game) & (armor_killed_in < first_game + sessions)
+            if armor_index is not None:
+                emitted[day, armor_index] += numpy.count_nonzero(armor_day)
+
+            gaps = rng.exponential(mean_gap, (batch, sessions))
+            starts = rng.uniform(0, SECONDS_PER_DAY, (batch, 1)) + numpy.cumsum(gaps, axis=1)
+            rolling = rate_limited(starts)[:, :, None]
+            game_index = first_game + numpy.arange(sessions)
+            first_boss_rolls = game_index[None, :] > armor_killed_in[:, None]
+
+            shape = (batch, sessions, len(drop_chances))
+            dropped = boss_drops(drop_chances, rng.random(shape)) & rolling
+            dropped[:, :, 0] &= first_boss_rolls
+            tokens = token_index(token_thresholds, rng.random(shape))
+            kept = dropped & (rng.random(shape) < kill_rate) & (tokens < tokens_count)
+            emitted[day] += numpy.bincount(tokens[kept], minlength=tokens_count)
+    return emitted
@@ -1,3 +1,187 @@
-from django.test import TestCase
+import os
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from pytezos.crypto.encoding import base58_encode
+
+from api.archive import archivable_games, archive_batch
+from api.bench import create_reference_data
+from api.models import (TezosUser, GameSession, Boss, Token, Drop, ArchivedGameSession, ArchivedDrop, DailyStats,
+                        DailyTokenStats)
+from api.reference import reference_data
+from api.rollups import roll_up
+
+
+def create_player(**kwargs):
+    return TezosUser.objects.create(address=base58_encode(os.urandom(20), b'tz1').decode(), success_sign=True,
+                                    **kwargs)
+
+
+def create_game(player, creation_time, status=GameSession.ENDED, end_time=None, **kwargs):
+    game = GameSession.objects.create(player=player, status=status, end_time=end_time, **kwargs)
+    GameSession.objects.filter(pk=game.pk).update(creation_time=creation_time)
+    return game
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        create_reference_data()
+        self.reference = reference_data()
+        self.bosses = list(Boss.objects.order_by('level'))
+        self.tokens = list(Token.objects.order_by('token_id'))
+        self.old = timezone.now() - timedelta(days=90)
+        self.cutoff = timezone.now() - timedelta(days=30)
+
+    def test_pending_armor_drop_stays_live(self):
+        player = create_player(armor_state=TezosUser.ARMOR_PENDING)
+        game = create_game(player, self.old)
+        Drop.objects.create(game=game, boss=self.reference.first_boss, dropped_token=self.reference.armor_token)
+
+        self.assertFalse(archivable_games(self.cutoff).filter(pk=game.pk).exists())
+        self.assertEqual(archive_batch(self.cutoff, 100), (0, 0))
+        self.assertTrue(GameSession.objects.filter(pk=game.pk).exists())
+
+    def test_games_with_untransferred_killed_drops_are_skipped(self):
+        player = create_player(armor_state=TezosUser.ARMOR_KILLED)
+        waiting = create_game(player, self.old)
+        Drop.objects.create(game=waiting, boss=self.bosses[1], boss_killed=True, dropped_token=self.tokens[1])
+        settled = create_game(player, self.old)
+        Drop.objects.create(game=settled, boss=self.bosses[1], boss_killed=True, dropped_token=self.tokens[1],
+                            transfer_date=timezone.now())
+        Drop.objects.create(game=settled, boss=self.bosses[2], dropped_token=self.tokens[2])
+
+        self.assertEqual(archive_batch(self.cutoff, 100), (1, 2))
+        self.assertTrue(GameSession.objects.filter(pk=waiting.pk).exists())
+        self.assertEqual(Drop.objects.filter(game=waiting).count(), 1)
+        self.assertFalse(GameSession.objects.filter(pk=settled.pk).exists())
+        self.assertTrue(ArchivedGameSession.objects.filter(pk=settled.pk).exists())
+
+    def test_player_stats_are_unchanged_by_archiving(self):
+        player = create_player(armor_state=TezosUser.ARMOR_KILLED)
+        for days, score, weapon in ((80, 300, 'ZOOOKA'), (70, 900, 'ZOOOKA'), (60, 100, 'LASER'), (1, 500, 'LASER'),
+                                    (0, 200, 'LASER')):
+            game = create_game(player, timezone.now() - timedelta(days=days), score=score, favourite_weapon=weapon,
+                               mobs_killed=score // 10, shots_fired=score // 5)
+            Drop.objects.create(game=game, boss=self.bosses[1], boss_killed=True, dropped_token=self.tokens[1],
+                                transfer_date=timezone.now())
+            Drop.objects.create(game=game, boss=self.bosses[2])
+        create_game(player, self.old, status=GameSession.ABANDONED, score=5000)
+
+        def stats():
+            response = self.client.get('/back/api/player/stats/get/', {'address': player.address},
+                                       HTTP_HOST='localhost')
+            self.assertEqual(response.status_code, 200)
+            return response.json()
+
+        before = stats()
+        self.assertEqual(archive_batch(self.cutoff, 2), (2, 4))
+        self.assertEqual(stats(), before)
+        self.assertEqual(archive_batch(self.cutoff, 100), (2, 2))
+        self.assertEqual(stats(), before)
+        self.assertEqual(GameSession.objects.count(), 2)
+
+
+@override_settings(ROLLUP_LAG_SECONDS=0)
+class RollupTests(TestCase):
+    def setUp(self):
+        create_reference_data()
+        self.bosses = list(Boss.objects.order_by('level'))
+        self.tokens = list(Token.objects.order_by('token_id'))
+        self.players = [create_player() for _ in range(3)]
+
+    def create_history(self, first_day, last_day, legacy=False):
+        """Games of up to three players a day, with legacy ones the first player's have no end_time."""
+        now = timezone.now()
+        for day in range(first_day, last_day - 1, -1):
+            for index, player in enumerate(self.players[:1 + day % 3]):
+                start = now - timedelta(days=day, hours=index * 5)
+                status = GameSession.ABANDONED if (day + index) % 4 == 0 else GameSession.ENDED
+                end_time = None if legacy and index == 0 else start + timedelta(hours=3)
+                game = create_game(player, start, status=status, end_time=end_time)
+                for boss, token in zip(self.bosses[:2 + index], self.tokens[day % 2:]):
+                    transfer_date = start + timedelta(days=1) if (day + boss.level) % 2 else None
+                    if transfer_date is not None and transfer_date >= now:
+                        transfer_date = None
+                    Drop.objects.create(game=game, boss=boss, boss_killed=boss.level != 3, dropped_token=token,
+                                        transfer_date=transfer_date)
+
+    def assert_matches_history(self):
+        expected = {}
+
+        def day_row(day):
+            return expected.setdefault(day, {'games_started': 0, 'games_ended': 0, 'games_abandoned': 0,
+                                             'active_players': set()})
+
+        finish_days = {}
+        for model in (GameSession, ArchivedGameSession):
+            for game_id, creation_time, end_time, game_status, player_id in model.objects.values_list(
+                    'id', 'creation_time', 'end_time', 'status', 'player_id'):
+                row = day_row(timezone.localdate(creation_time))
+                row['games_started'] += 1
+                row['active_players'].add(player_id)
+                finish_days[game_id] = timezone.localdate(end_time or creation_time)
+                day_row(finish_days[game_id])[
+                    'games_ended' if game_status == GameSession.ENDED else 'games_abandoned'] += 1
+        for row in expected.values():
+            row['active_players'] = len(row['active_players'])
+        self.assertEqual({row.pop('day'): row for row in DailyStats.objects.values(
+            'day', 'games_started', 'games_ended', 'games_abandoned', 'active_players')}, expected)
+
+        expected_tokens = {}
+        for model in (Drop, ArchivedDrop):
+            dropped = (model.objects.filter(boss_killed=True, dropped_token__isnull=False)
+                       .values_list('game_id', 'dropped_token__token_id'))
+            for game_id, token_id in dropped:
+                row = expected_tokens.setdefault((finish_days[game_id], token_id), [0, 0])
+                row[0] += 1
+            transferred = (model.objects.filter(transfer_date__isnull=False)
+                           .values_list('transfer_date', 'dropped_token__token_id'))
+            for transfer_date, token_id in transferred:
+                row = expected_tokens.setdefault((timezone.localdate(transfer_date), token_id), [0, 0])
+                row[1] += 1
+        self.assertEqual({(row.day, row.token_id): [row.dropped, row.transferred]
+                          for row in DailyTokenStats.objects.all()}, expected_tokens)
+
+    def test_incremental_rollup_matches_direct_aggregate(self):
+        self.create_history(12, 5)
+        counted = roll_up(batch_size=3, max_batches=2)
+        self.assertEqual(counted['started'], 6)
+        while any(roll_up(batch_size=3, max_batches=1).values()):
+            pass
+        self.assert_matches_history()
+
+        self.create_history(4, 1)
+        roll_up(batch_size=4)
+        self.assert_matches_history()
+        self.assertEqual(roll_up(batch_size=4), {'started': 0, 'finished': 0, 'transfers': 0})
+
+    def test_rollup_counts_archived_and_legacy_games(self):
+        self.create_history(130, 100, legacy=True)
+        for drop in Drop.objects.filter(boss_killed=True, transfer_date=None).select_related('game'):
+            if drop.game_id % 2:
+                drop.transfer_date = drop.game.creation_time + timedelta(days=2)
+                drop.save(update_fields=['transfer_date'])
+        archived_games, _ = archive_batch(timezone.now() - timedelta(days=30), 1000)
+        self.assertTrue(0 < archived_games < GameSession.objects.count() + archived_games)
+        self.create_history(3, 1)
+        while any(roll_up(batch_size=5, max_batches=1).values()):
+            pass
+        self.assert_matches_history()
+        self.assertEqual(sum(DailyStats.objects.values_list('games_started', flat=True)),
+                         GameSession.objects.count() + ArchivedGameSession.objects.count())
+
+
+class MetricsTests(TestCase):
+    def test_metrics_need_staff_or_token(self):
+        self.assertEqual(self.client.get('/back/metrics/', HTTP_HOST='localhost').status_code, 403)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/back/metrics/', HTTP_HOST='localhost',
+                                             HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/back/metrics/', HTTP_HOST='localhost',
+                                             HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get('/back/metrics/', HTTP_HOST='localhost').status_code, 200)
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get('/back/metrics/', HTTP_HOST='localhost').status_code, 404)
@@ -0,0 +1,189 @@
+"""
+Lightweight span tracing.
+
+`span()` times a block and hands the finished span to the exporter configured by TRACING_EXPORTER,
+`traced()` does the same for a whole function. Spans of one request share the trace id that
+TracingMiddleware takes from the `X-Trace-Id` header or generates, and `TraceIdFilter` adds it to
+log records. With TRACING_ENABLED off spans are no-ops and the middleware is not used.
+"""
+import functools
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.module_loading import import_string
+
+current_span = ContextVar('current_span', default=None)
+current_trace_id = ContextVar('current_trace_id', default=None)
+
+exporter_lock = threading.Lock()
+exporter = None
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start', 'duration', 'attributes', 'error')
+
+    def __init__(self, trace_id, parent_id, name, attributes):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class NullExporter:
+    def export(self, span):
+        pass
+
+
+class JsonlFileExporter:
+    """Appends one JSON object per finished span to a local file, usable without any collector."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', buffering=1)
+
+    def export(self, span):
+        line = json.dumps(span.as_dict(), default=str)
+        with self.lock:
+            self.file.write(line + '\n')
+
+
+def get_exporter():
+    global exporter
+    if exporter is None and settings.TRACING_ENABLED:
+        with exporter_lock:
+            if exporter is None:
+                exporter = import_string(settings.TRACING_EXPORTER)(**settings.TRACING_EXPORTER_OPTIONS)
+    return exporter
+
+
+def get_trace_id():
+    parent = current_span.get()
+    return parent.trace_id if parent is not None else current_trace_id.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    span_exporter = get_exporter()
+    if span_exporter is None:
+        yield None
+        return
+
+    parent = current_span.get()
+    new_span = Span(get_trace_id() or uuid.uuid4().hex, parent.span_id if parent is not None else None, name,
+                    attributes)
+    token = current_span.set(new_span)
+    started = time.perf_counter()
+    try:
+        yield new_span
+    except BaseException as error:
+        new_span.error = f'{type(error).__name__}: {error}'
+        raise
+    finally:
+        new_span.duration = time.perf_counter() - started
+        current_span.reset(token)
+        span_exporter.export(new_span)
+
+
+def traced(name):
+    def decorator(function):
+        if iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    with span('db.query', sql=sql[:500], many=many):
+        return execute(sql, params, many, context)
+
+
+def install_db_instrumentation(sender, connection, **kwargs):
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+class TraceIdFilter:
+    def filter(self, record):
+        record.trace_id = get_trace_id() or '-'
+        return True
+
+
+class TracingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_trace_id.set(self.incoming_trace_id(request))
+        try:
+            with span('http.request', method=request.method, path=request.path) as request_span:
+                response = self.get_response(request)
+                self.finish(request, response, request_span)
+        finally:
+            current_trace_id.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        token = current_trace_id.set(self.incoming_trace_id(request))
+        try:
+            with span('http.request', method=request.method, path=request.path) as request_span:
+                response = await self.get_response(request)
+                self.finish(request, response, request_span)
+        finally:
+            current_trace_id.reset(token)
+        return response
+
+    def incoming_trace_id(self, request):
+        trace_id = request.headers.get('X-Trace-Id', '')
+        if len(trace_id) == 32 and all(char in '0123456789abcdef' for char in trace_id):
+            return trace_id
+        return uuid.uuid4().hex
+
+    def finish(self, request, response, request_span):
+        resolver_match = getattr(request, 'resolver_match', None)
+        request_span.set_attribute('route', resolver_match.route if resolver_match is not None else 'unmatched')
+        request_span.set_attribute('status', response.status_code)
+        response['X-Trace-Id'] = request_span.trace_id
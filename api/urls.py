@@ -14,5 +14,9 @@ urlpatterns = [
     path('drop/get/', GetDrop.as_view()),
     path('achievements/get/', GetAchievements.as_view()),
     path('player/stats/get/', GetPlayerStats.as_view()),
+    path('player/games/', GetPlayerGames.as_view()),
     path('player/games/has-active/', HasActiveGames.as_view()),
+    path('events/', PlayerEvents.as_view()),
+    path('stats/daily/', GetDailyStats.as_view()),
+    path('export/', ExportData.as_view()),
 ]
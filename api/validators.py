@@ -1,16 +1,18 @@
-import requests
 import json
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
 from django.conf import settings
 from rest_framework.exceptions import ValidationError
-from api.models import TezosUser, GameSession, Boss
-from pytezos import Key
-from pytezos.crypto.encoding import is_address
+from api.metrics import outbound_call
+from api.tracing import span, traced
+from api.models import TezosUser, GameSession
+from api.reference import reference_data
 
 
 class PublicKeyValidator:
+    @traced('validator.public_key')
     def __call__(self, pk):
+        from pytezos import Key
         try:
             Key.from_encoded_key(pk)
         except ValueError as error:
@@ -19,7 +21,9 @@ class PublicKeyValidator:
 
 
 class SignedAddressValidator:
+    @traced('validator.signed_address')
     def __call__(self, address):
+        from pytezos.crypto.encoding import is_address
         try:
             validated = is_address(address)
             if not validated:
@@ -32,13 +36,49 @@ class SignedAddressValidator:
         return address
 
 
+class AsyncSignedAddressValidator:
+    @traced('validator.signed_address')
+    async def __call__(self, address):
+        from pytezos.crypto.encoding import is_address
+        try:
+            validated = is_address(address)
+            if not validated:
+                raise ValidationError('It is not Tezos-compatible address.')
+            tezos_user = await TezosUser.objects.aget(address=address)
+            if not tezos_user.success_sign:
+                raise ValidationError('This user did not yet successfully signed payload.')
+        except ObjectDoesNotExist:
+            raise ValidationError('Tezos user with this address not found.')
+        return address
+
+
 class CaptchaValidator:
+    @traced('validator.captcha')
     def __call__(self, captcha_value):
+        import requests
         verified_data = {
             'secret': settings.CAPTCHA_SECRET,
             'response': captcha_value
         }
-        google_validation_response = requests.post(settings.CAPTCHA_VERIFY_URL, data=verified_data)
+        with outbound_call('captcha'), span('captcha.request'):
+            google_validation_response = requests.post(settings.CAPTCHA_VERIFY_URL, data=verified_data)
+        if not json.loads(google_validation_response.text)['success']:
+            raise ValidationError(json.loads(google_validation_response.text))
+
+        return captcha_value
+
+
+class AsyncCaptchaValidator:
+    @traced('validator.captcha')
+    async def __call__(self, captcha_value):
+        import httpx
+        verified_data = {
+            'secret': settings.CAPTCHA_SECRET,
+            'response': captcha_value
+        }
+        with outbound_call('captcha'), span('captcha.request'):
+            async with httpx.AsyncClient() as client:
+                google_validation_response = await client.post(settings.CAPTCHA_VERIFY_URL, data=verified_data)
         if not json.loads(google_validation_response.text)['success']:
             raise ValidationError(json.loads(google_validation_response.text))
 
@@ -46,15 +86,17 @@ class CaptchaValidator:
 
 
 class GameHashValidator:
+    @traced('validator.game_hash')
     def __call__(self, hash_value):
         try:
             GameSession.objects.get(hash=hash_value)
-        except ObjectDoesNotExist:
+        except (ObjectDoesNotExist, DjangoValidationError):
             raise ValidationError('Game with this id not found.')
         return hash_value
 
 
 class GameIsActiveValidator(GameHashValidator):
+    @traced('validator.game_is_active')
     def __call__(self, hash_value):
         super().__call__(hash_value)
         game = GameSession.objects.get(hash=hash_value)
@@ -63,6 +105,7 @@ class GameIsActiveValidator(GameHashValidator):
 
 
 class GameIsPausedValidator(GameHashValidator):
+    @traced('validator.game_is_paused')
     def __call__(self, hash_value):
         super().__call__(hash_value)
         game = GameSession.objects.get(hash=hash_value)
@@ -71,6 +114,7 @@ class GameIsPausedValidator(GameHashValidator):
 
 
 class GameIsActiveOrPausedValidator(GameHashValidator):
+    @traced('validator.game_is_active_or_paused')
     def __call__(self, hash_value):
         super().__call__(hash_value)
         game = GameSession.objects.get(hash=hash_value)
@@ -79,9 +123,10 @@ class GameIsActiveOrPausedValidator(GameHashValidator):
 
 
 class KillBossValidator:
+    @traced('validator.kill_boss')
     def __call__(self, boss_id):
         try:
-            Boss.objects.get(id=boss_id)
+            reference_data().get_boss(boss_id)
         except ObjectDoesNotExist:
             raise ValidationError('Boss with this id not found.')
         return boss_id
@@ -1,20 +1,55 @@
-import random
+from collections import Counter
 from datetime import timedelta
 
-from pytezos import pytezos
-
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.db.models import Count, F, Max, Sum
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
 
-from api.models import Token, Drop, get_payload_for_sign, Achievement, UserAchievement
+from api.models import (Drop, get_payload_for_sign, Achievement, UserAchievement, ArchivedGameSession,
+                        ArchivedDrop, NOT_UNDER_REVIEW, DailyStats, DailyTokenStats)
 from api.serializers import *
 
 from drf_yasg import openapi
 
+from api.export import CONTENT_TYPES, Encoder, aiter_rows, iter_rows
+from api.events import ACHIEVEMENT, TRANSFER, broker, publish, publish_drops, stream
+from api.drops import roll_drops, new_drop_seed, seeded_drop, seeded_drops
+from api.fastpath import (FastGameValidationMixin, ADDRESS_SCHEMA, GAME_SCHEMA, END_GAME_SCHEMA,
+                          KILL_BOSS_SCHEMA)
+from api.pagination import after_cursor, encode_cursor
+from api.renderers import EventStreamRenderer, FastJSONRenderer
+from api.reference import reference_data
+from api.routers import replica_reads
+from api.tezos import transfer_tokens
+from api.tracing import span
+
+
+class AsyncGenericAPIView(AsyncAPIView, GenericAPIView):
+    """GenericAPIView whose handlers are coroutines, so ASGI workers are not pinned while waiting for I/O."""
+
+
+class ReplicaReadMixin:
+    """Serves every query of the view, validation included, from the read replica if there is one."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if getattr(self, 'view_is_async', False):
+            return self.replica_async_dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    async def replica_async_dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            return await super().dispatch(request, *args, **kwargs)
+
 
 class GetPayload(GenericAPIView):
     serializer_class = PublicKeySerializer
@@ -34,6 +69,7 @@ class GetPayload(GenericAPIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        from pytezos import Key
         key = Key.from_encoded_key(serializer.validated_data['public_key'])
         tezos_user, created = TezosUser.objects.get_or_create(
             public_key=key.public_key(),
@@ -71,7 +107,7 @@ class VerifyPayload(GenericAPIView):
         return Response({'response': 'Successfully verified.'}, status=status.HTTP_200_OK)
 
 
-class VerifyCaptcha(GenericAPIView):
+class VerifyCaptcha(AsyncGenericAPIView):
     serializer_class = CaptchaSerializer
 
     @swagger_auto_schema(responses={
@@ -84,16 +120,17 @@ class VerifyCaptcha(GenericAPIView):
             }
         )
     })
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
+        if not await serializer.ais_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({'response': 'Successfully verified.'}, status=status.HTTP_200_OK)
 
 
-class StartGame(GenericAPIView):
+class StartGame(FastGameValidationMixin, GenericAPIView):
     serializer_class = AddressSerializer
+    fast_schema = ADDRESS_SCHEMA
 
     @swagger_auto_schema(
         operation_description="Starts new game session, return current if provided address already have active session",
@@ -117,61 +154,63 @@ class StartGame(GenericAPIView):
             )
         })
     def post(self, request):
-        serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        tezos_user = TezosUser.objects.get(address=serializer.validated_data['address'])
+        data, errors = self.validate_request()
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        tezos_user = data['player']
 
         last_minute = timezone.now() - timedelta(minutes=1)
         last_minute_games_count = GameSession.objects.filter(player=tezos_user, creation_time__gte=last_minute).count()
         drop_is_able = last_minute_games_count <= settings.MAX_GAMES_PER_MINUTE
 
-        GameSession.objects.filter(player=tezos_user, status__in=[GameSession.CREATED, GameSession.PAUSED]).update(
-            status=GameSession.ABANDONED)
+        active_games = GameSession.objects.filter(player=tezos_user,
+                                                  status__in=[GameSession.CREATED, GameSession.PAUSED])
+        abandoned_ids = list(active_games.values_list('id', flat=True)) if settings.EVENTS_ENABLED else []
+        active_games.update(status=GameSession.ABANDONED, end_time=timezone.now())
+        publish_drops(tezos_user.id, abandoned_ids)
         game = GameSession(player=tezos_user, status=GameSession.CREATED)
+        if settings.LAZY_DROPS and drop_is_able:
+            game.drop_seed = new_drop_seed()
         game.save()
 
-        first_boss = Boss.objects.all().first()
-        armor_token = Token.objects.get(token_id=settings.ARMOR_TOKEN_ID)
-        previous_armor_drops = Drop.objects.filter(game__player=tezos_user, boss=first_boss, dropped_token=armor_token)
-        previous_armor_boss_killed = previous_armor_drops.filter(boss_killed=True).exists()
-        if not previous_armor_drops.exists():
+        reference = reference_data()
+        first_boss = reference.first_boss
+        armor_token = reference.armor_token
+        game_drops = []
+        if tezos_user.armor_state == TezosUser.ARMOR_NOT_DROPPED:
             armor_drop = Drop(boss=first_boss, dropped_token=armor_token, game=game)
             armor_drop.save()
-        elif not previous_armor_boss_killed:
-            previous_armor_drops.update(game=game)
+            tezos_user.armor_state = TezosUser.ARMOR_PENDING
+            tezos_user.save(update_fields=['armor_state'])
+            game_drops.append((first_boss, armor_token))
+        elif tezos_user.armor_state == TezosUser.ARMOR_PENDING:
+            if Drop.objects.filter(game__player=tezos_user, boss=first_boss, dropped_token=armor_token,
+                                   boss_killed=False).update(game=game):
+                game_drops.append((first_boss, armor_token))
 
         if drop_is_able:
-            all_bosses = Boss.objects.all()
-            if not previous_armor_boss_killed:
-                all_bosses = all_bosses.exclude(id=first_boss.id)
-            for boss in all_bosses:
-                random_number_for_boss = random.random() * 100
-                boss_dropped = random_number_for_boss <= boss.drop_chance
-                if boss_dropped:
-                    all_tokens = Token.objects.all()
-                    total_probability = sum(token.drop_chance for token in all_tokens)
-                    random_value = random.uniform(0, total_probability)
-                    probability_sum = 0
-                    chosen_token = None
-                    for token in all_tokens:
-                        probability_sum += token.drop_chance
-                        if random_value <= probability_sum:
-                            chosen_token = token
-                            break
-                    drop = Drop(game=game, boss=boss, dropped_token=chosen_token)
-                    drop.save()
+            bosses = reference.bosses
+            if tezos_user.armor_state != TezosUser.ARMOR_KILLED:
+                bosses = [boss for boss in bosses if boss.id != first_boss.id]
+            if game.drop_seed is not None:
+                game_drops += seeded_drops(game.drop_seed, bosses, reference)
+            else:
+                rolled_drops = list(roll_drops(bosses, reference))
+                Drop.objects.bulk_create([Drop(game=game, boss=boss, dropped_token=token)
+                                          for boss, token in rolled_drops])
+                game_drops += rolled_drops
 
         response_data = {
-            'game_id': game.hash,
-            'game_drop': [{'boss': drop.boss.id, 'token': drop.dropped_token.token_id} for drop in
-                          Drop.objects.filter(game=game)]
+            'game_id': game.hash.hex,
+            'game_drop': [{'boss': boss.id, 'token': token.token_id} for boss, token in game_drops]
         }
         return Response({'response': response_data}, status=status.HTTP_200_OK)
 
 
-class PauseGame(GenericAPIView):
+class PauseGame(FastGameValidationMixin, GenericAPIView):
     serializer_class = ActiveGameSerializer
+    fast_schema = GAME_SCHEMA
+    game_statuses = [GameSession.CREATED]
 
     @swagger_auto_schema(responses={
         "200": openapi.Response(
@@ -184,18 +223,20 @@ class PauseGame(GenericAPIView):
         )
     })
     def post(self, request):
-        serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        game = GameSession.objects.get(hash=serializer.validated_data['game_id'])
+        data, errors = self.validate_request()
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        game = data['game']
         game.status = GameSession.PAUSED
         game.pause_init_time = timezone.now()
-        game.save()
-        return Response({'response': f'Game {game.hash} paused.'}, status=status.HTTP_200_OK)
+        game.save(update_fields=['status', 'pause_init_time'])
+        return Response({'response': f'Game {game.hash.hex} paused.'}, status=status.HTTP_200_OK)
 
 
-class UnpauseGame(GenericAPIView):
+class UnpauseGame(FastGameValidationMixin, GenericAPIView):
     serializer_class = PausedGameSerializer
+    fast_schema = GAME_SCHEMA
+    game_statuses = [GameSession.PAUSED]
 
     @swagger_auto_schema(responses={
         "200": openapi.Response(
@@ -208,18 +249,20 @@ class UnpauseGame(GenericAPIView):
         )
     })
     def post(self, request):
-        serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        game = GameSession.objects.get(hash=serializer.validated_data['game_id'])
+        data, errors = self.validate_request()
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        game = data['game']
         game.status = GameSession.CREATED
         game.seconds_on_pause += (timezone.now() - game.pause_init_time).total_seconds()
-        game.save()
-        return Response({'response': f'Game {game.hash} unpaused.'}, status=status.HTTP_200_OK)
+        game.save(update_fields=['status', 'seconds_on_pause'])
+        return Response({'response': f'Game {game.hash.hex} unpaused.'}, status=status.HTTP_200_OK)
 
 
-class EndGame(GenericAPIView):
+class EndGame(FastGameValidationMixin, GenericAPIView):
     serializer_class = EndGameSerializer
+    fast_schema = END_GAME_SCHEMA
+    game_statuses = [GameSession.CREATED, GameSession.PAUSED]
 
     @swagger_auto_schema(
         operation_description="End active game",
@@ -234,20 +277,25 @@ class EndGame(GenericAPIView):
             )
         })
     def post(self, request):
-        serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        game = GameSession.objects.get(hash=serializer.validated_data['game_id'])
+        data, errors = self.validate_request()
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        game = data['game']
+        game.end_time = timezone.now()
+        if game.status == GameSession.PAUSED:
+            game.seconds_on_pause += (game.end_time - game.pause_init_time).total_seconds()
         game.status = GameSession.ENDED
-        game.score = serializer.validated_data['score']
-        game.favourite_weapon = serializer.validated_data['favourite_weapon']
-        game.shots_fired = serializer.validated_data['shots_fired']
-        game.mobs_killed = serializer.validated_data['mobs_killed']
-        game.save()
-        return Response({'response': f'Game session {game.hash} ended.'}, status=status.HTTP_200_OK)
+        game.score = data['score']
+        game.favourite_weapon = data['favourite_weapon']
+        game.shots_fired = data['shots_fired']
+        game.mobs_killed = data['mobs_killed']
+        game.save(update_fields=['status', 'end_time', 'seconds_on_pause', 'score', 'favourite_weapon', 'shots_fired',
+                                 'mobs_killed'])
+        publish_drops(game.player_id, [game.id])
+        return Response({'response': f'Game session {game.hash.hex} ended.'}, status=status.HTTP_200_OK)
 
 
-class TransferDrop(GenericAPIView):
+class TransferDrop(AsyncGenericAPIView):
     serializer_class = TransferDropSerializer
 
     @swagger_auto_schema(
@@ -265,48 +313,49 @@ class TransferDrop(GenericAPIView):
                 }
             )
         })
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
+        if not await serializer.ais_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        tezos_user = TezosUser.objects.get(address=serializer.validated_data['address'])
-
-        drops = Drop.objects.filter(game__player__address=tezos_user.address,
-                                    game__status__in=[GameSession.ENDED, GameSession.ABANDONED],
-                                    boss_killed=True,
-                                    dropped_token__isnull=False,
-                                    transfer_date=None)
+        address = serializer.validated_data['address']
+
+        with span('transfer.pending_drops'):
+            drops = [drop async for drop in Drop.objects.filter(NOT_UNDER_REVIEW,
+                                                                game__player__address=address,
+                                                                game__status__in=[GameSession.ENDED,
+                                                                                  GameSession.ABANDONED],
+                                                                boss_killed=True,
+                                                                dropped_token__isnull=False,
+                                                                transfer_date=None).select_related('dropped_token')]
         if len(drops) == 0:
             return Response({'response': {'tokens_transfered': 0}}, status=status.HTTP_200_OK)
         else:
-            pt = pytezos.using(key=settings.PRIVATE_KEY, shell=f'https://rpc.tzkt.io/{settings.NETWORK}')
-            contract = pt.contract(settings.CONTRACT)
             try:
-                tx = contract.transfer([
-                    {
-                        "from_": f'{pt.key.public_key_hash()}',
-                        "txs": [{
-                            "to_": f'{tezos_user.address}',
-                            "token_id": drop.dropped_token.token_id,
-                            "amount": 1
-                        } for drop in drops]
-                    }
-                ])
-                injected_tx = tx.send(min_confirmations=1)
-
-                num_transferred = drops.update(transfer_date=timezone.now())
+                operation_hash = await sync_to_async(transfer_tokens, thread_sensitive=False)(
+                    address, [drop.dropped_token.token_id for drop in drops])
+
+                with span('transfer.mark_transferred'):
+                    num_transferred = await Drop.objects.filter(id__in=[drop.id for drop in drops]).aupdate(
+                        transfer_date=timezone.now(), operation_hash=operation_hash)
+                if settings.EVENTS_ENABLED:
+                    amounts = Counter(drop.dropped_token.token_id for drop in drops)
+                    player_id = await TezosUser.objects.filter(address=address).values_list('id', flat=True).afirst()
+                    await sync_to_async(publish)(player_id, TRANSFER, {
+                        'operation_hash': operation_hash,
+                        'tokens': [{'token_id': token_id, 'amount': amount} for token_id, amount in amounts.items()],
+                    })
                 return Response({
                     'response': {
                         'tokens_transfered': num_transferred,
-                        'operation_hash': injected_tx.hash()
+                        'operation_hash': operation_hash
                     },
                 }, status=status.HTTP_200_OK)
             except Exception as error:
                 return Response({'error': f'Tezos error: {error}'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class GetDrop(GenericAPIView):
-    serializer_class = AddressSerializer
+class GetDrop(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = AsyncAddressSerializer
 
     @swagger_auto_schema(
         operation_description="Get list of all drops from ended and abandoned games for provided address.",
@@ -321,13 +370,13 @@ class GetDrop(GenericAPIView):
             )
         },
         query_serializer=serializer_class)
-    def get(self, request):
+    async def get(self, request):
         serializer = self.serializer_class(data=self.request.query_params)
-        if not serializer.is_valid():
+        if not await serializer.ais_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        tezos_user = TezosUser.objects.get(address=serializer.validated_data['address'])
 
-        drops = (Drop.objects.filter(game__player__address=tezos_user.address,
+        drops = (Drop.objects.filter(NOT_UNDER_REVIEW,
+                                     game__player__address=serializer.validated_data['address'],
                                      game__status__in=[GameSession.ENDED, GameSession.ABANDONED],
                                      boss_killed=True,
                                      dropped_token__isnull=False,
@@ -335,11 +384,13 @@ class GetDrop(GenericAPIView):
                  .values(token_id=F('dropped_token__token_id'))
                  .annotate(amount=Count('token_id')))
 
-        return Response({'response': drops}, status=status.HTTP_200_OK)
+        return Response({'response': [drop async for drop in drops]}, status=status.HTTP_200_OK)
 
 
-class KillBoss(GenericAPIView):
+class KillBoss(FastGameValidationMixin, GenericAPIView):
     serializer_class = KillBossSerializer
+    fast_schema = KILL_BOSS_SCHEMA
+    game_statuses = [GameSession.CREATED]
 
     @swagger_auto_schema(
         operation_description="Kill boss in provided game session",
@@ -354,31 +405,44 @@ class KillBoss(GenericAPIView):
             )
         })
     def post(self, request):
-        serializer = self.serializer_class(data=self.request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        game = GameSession.objects.get(hash=serializer.validated_data['game_id'])
-        boss = Boss.objects.get(id=serializer.validated_data['boss'])
-        drop, created = Drop.objects.get_or_create(game=game, boss=boss)
-        drop.boss_killed = True
-        drop.save()
+        data, errors = self.validate_request()
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        game = data['game']
+        boss = data['boss']
+        reference = reference_data()
+        defaults = {'boss_killed': True}
+        if game.drop_seed is not None:
+            defaults['dropped_token'] = seeded_drop(game.drop_seed, boss, reference)
+        drop, created = Drop.objects.get_or_create(game=game, boss=boss, defaults=defaults)
+        if not created:
+            drop.boss_killed = True
+            drop.save(update_fields=['boss_killed'])
+        if boss.id == reference.first_boss.id and drop.dropped_token_id == reference.armor_token.id:
+            TezosUser.objects.filter(pk=game.player_id, armor_state=TezosUser.ARMOR_PENDING).update(
+                armor_state=TezosUser.ARMOR_KILLED)
 
         try:
-            kill_boss_achievement = Achievement.objects.get(type=Achievement.KILL_BOSS)
+            kill_boss_achievement = reference.get_achievement(Achievement.KILL_BOSS)
             user_achievement, created = UserAchievement.objects.get_or_create(player=game.player,
                                                                               achievement=kill_boss_achievement)
 
             if user_achievement.current_progress < user_achievement.achievement.target_progress:
                 user_achievement.current_progress += 1
                 user_achievement.save()
+                publish(game.player_id, ACHIEVEMENT, {
+                    'achievement': {'name': kill_boss_achievement.name,
+                                    'token_id': kill_boss_achievement.reward_token.token_id},
+                    'percent_progress': user_achievement.percent_progress,
+                })
         except ObjectDoesNotExist:
             pass
 
         return Response({'response': 'Successfully killed.'}, status=status.HTTP_200_OK)
 
 
-class GetAchievements(GenericAPIView):
-    serializer_class = AddressSerializer
+class GetAchievements(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = AsyncAddressSerializer
 
     @swagger_auto_schema(
         operation_description="Returns list of player game achievements.",
@@ -399,17 +463,19 @@ class GetAchievements(GenericAPIView):
             )
         },
         query_serializer=serializer_class)
-    def get(self, request):
+    async def get(self, request):
         serializer = self.serializer_class(data=self.request.query_params)
-        if not serializer.is_valid():
+        if not await serializer.ais_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        user_achievements = UserAchievement.objects.filter(player__address=serializer.validated_data['address'])
-        serialized_achievements = UserAchievementSerializer(user_achievements, many=True)
+        user_achievements = (UserAchievement.objects.filter(player__address=serializer.validated_data['address'])
+                             .select_related('achievement__reward_token'))
+        serialized_achievements = UserAchievementSerializer([user_achievement async for user_achievement in
+                                                             user_achievements], many=True)
         return Response(serialized_achievements.data)
 
 
-class GetPlayerStats(GenericAPIView):
-    serializer_class = AddressSerializer
+class GetPlayerStats(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = AsyncAddressSerializer
 
     @swagger_auto_schema(
         operation_description="Returns player statistics.",
@@ -431,29 +497,44 @@ class GetPlayerStats(GenericAPIView):
             )
         },
         query_serializer=serializer_class)
-    def get(self, request):
+    async def get(self, request):
         serializer = self.serializer_class(data=self.request.query_params)
-        if not serializer.is_valid():
+        if not await serializer.ais_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        player = TezosUser.objects.get(address=serializer.validated_data['address'])
+        player = await TezosUser.objects.select_related('archived_stats').aget(
+            address=serializer.validated_data['address'])
         player_games = GameSession.objects.filter(player=player, status=GameSession.ENDED)
         key = 'favourite_weapon'
         favourite_weapon = getattr(
-            player_games.values(key).annotate(count=Count(key)).order_by('-count').first(), key,
+            await player_games.values(key).annotate(count=Count(key)).order_by('-count').afirst(), key,
             '')
+        games_stats = await player_games.aaggregate(games_played=Count('id'),
+                                                    best_score=Max("score", default=0),
+                                                    mobs_killed=Sum("mobs_killed", default=0),
+                                                    shots_fired=Sum("shots_fired", default=0))
+        bosses_killed = await Drop.objects.filter(game__player=player, boss_killed=True).acount()
+        archived_stats = getattr(player, 'archived_stats', None)
+        if archived_stats is not None:
+            if archived_stats.games_played:
+                games_stats['best_score'] = (archived_stats.best_score if not games_stats['games_played'] else
+                                             max(games_stats['best_score'], archived_stats.best_score))
+            games_stats['games_played'] += archived_stats.games_played
+            games_stats['mobs_killed'] += archived_stats.mobs_killed
+            games_stats['shots_fired'] += archived_stats.shots_fired
+            bosses_killed += archived_stats.bosses_killed
         response = {
-            "games_played": player_games.count(),
-            "bosses_killed": Drop.objects.filter(game__player=player, boss_killed=True).count(),
-            "best_score": player_games.aggregate(Max("score", default=0))['score__max'],
-            "mobs_killed": player_games.aggregate(Sum("mobs_killed", default=0))['mobs_killed__sum'],
-            "shots_fired": player_games.aggregate(Sum("shots_fired", default=0))['shots_fired__sum'],
+            "games_played": games_stats['games_played'],
+            "bosses_killed": bosses_killed,
+            "best_score": games_stats['best_score'],
+            "mobs_killed": games_stats['mobs_killed'],
+            "shots_fired": games_stats['shots_fired'],
             "favourite_weapon": favourite_weapon if favourite_weapon is not None else ""
         }
         return Response({'response': response}, status=status.HTTP_200_OK)
 
 
-class HasActiveGames(GenericAPIView):
-    serializer_class = AddressSerializer
+class HasActiveGames(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = AsyncAddressSerializer
 
     @swagger_auto_schema(
         operation_description="Returns info whether player has active game sessions.",
@@ -470,11 +551,193 @@ class HasActiveGames(GenericAPIView):
             )
         },
         query_serializer=serializer_class)
-    def get(self, request):
+    async def get(self, request):
         serializer = self.serializer_class(data=self.request.query_params)
-        if not serializer.is_valid():
+        if not await serializer.ais_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        player = TezosUser.objects.get(address=serializer.validated_data['address'])
-        has_games = GameSession.objects.filter(player=player,
-                                               status__in=[GameSession.CREATED, GameSession.PAUSED]).exists()
+        has_games = await GameSession.objects.filter(player__address=serializer.validated_data['address'],
+                                                     status__in=[GameSession.CREATED, GameSession.PAUSED]).aexists()
         return Response({'response': {'has_games': has_games}}, status=status.HTTP_200_OK)
+
+
+class GetPlayerGames(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = PlayerGamesSerializer
+
+    @swagger_auto_schema(
+        operation_description="Returns finished games of the player, newest first, a page at a time.",
+        responses={
+            "200": openapi.Response(
+                description="Page of games with their drops and the cursor of the next page, null on the last one.",
+                examples={
+                    "application/json": {
+                        "response": {
+                            "games": [{
+                                "game_id": "2d946685c41548d7a144873ec3fc9301",
+                                "creation_time": "2024-03-13T13:21:00+00:00",
+                                "status": 1,
+                                "score": 120,
+                                "mobs_killed": 12,
+                                "shots_fired": 40,
+                                "favourite_weapon": "ZOOKA",
+                                "drops": [{"boss": 1, "token": 5, "boss_killed": True, "transferred": False}]
+                            }],
+                            "next_cursor": "MjAyNC0wMy0xM1QxMzoyMTowMCswMDowMHw0Mg=="
+                        }
+                    }
+                }
+            )
+        },
+        query_serializer=serializer_class)
+    async def get(self, request):
+        serializer = self.serializer_class(data=self.request.query_params)
+        if not await serializer.ais_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        address, cursor, limit = (serializer.validated_data[key] for key in ('address', 'cursor', 'limit'))
+
+        # Archived games are mostly but not strictly older than the live ones, so both tables are read from the
+        # cursor on and merged.
+        games = []
+        for game_model, drop_model in ((GameSession, Drop), (ArchivedGameSession, ArchivedDrop)):
+            page = after_cursor(game_model.objects.filter(player__address=address,
+                                                          status__in=[GameSession.ENDED, GameSession.ABANDONED]),
+                                cursor)
+            games += [(game, drop_model) async for game in page[:limit + 1]]
+        games.sort(key=lambda item: (item[0].creation_time, item[0].id), reverse=True)
+        has_next, games = len(games) > limit, games[:limit]
+
+        drops = {}
+        for drop_model in (Drop, ArchivedDrop):
+            game_ids = [game.id for game, model in games if model is drop_model]
+            if game_ids:
+                async for drop in (drop_model.objects.filter(game_id__in=game_ids).order_by('id')
+                                   .values('game_id', 'boss_id', 'dropped_token__token_id', 'boss_killed',
+                                           'transfer_date')):
+                    drops.setdefault((drop_model, drop['game_id']), []).append({
+                        'boss': drop['boss_id'],
+                        'token': drop['dropped_token__token_id'],
+                        'boss_killed': drop['boss_killed'],
+                        'transferred': drop['transfer_date'] is not None,
+                    })
+
+        response = {
+            'games': [{
+                'game_id': game.hash.hex,
+                'creation_time': game.creation_time,
+                'status': game.status,
+                'score': game.score,
+                'mobs_killed': game.mobs_killed,
+                'shots_fired': game.shots_fired,
+                'favourite_weapon': game.favourite_weapon or '',
+                'drops': drops.get((drop_model, game.id), []),
+            } for game, drop_model in games],
+            'next_cursor': encode_cursor(games[-1][0].creation_time, games[-1][0].id) if has_next else None,
+        }
+        return Response({'response': response}, status=status.HTTP_200_OK)
+
+
+class PlayerEvents(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = AsyncAddressSerializer
+    renderer_classes = [FastJSONRenderer, EventStreamRenderer]
+
+    @swagger_auto_schema(
+        operation_description="Server-Sent Events stream of the player's `transfer`, `drops` and `achievement` "
+                              "events. `drops` lists the tokens added to the balance of drop/get, `transfer` the "
+                              "tokens sent in an operation, `achievement` has the shape of achievements/get items.",
+        query_serializer=serializer_class)
+    async def get(self, request):
+        if not settings.EVENTS_ENABLED or isinstance(request._request, WSGIRequest):
+            return Response({'error': 'Push events are served by the ASGI server with EVENTS_ENABLED on.'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        serializer = self.serializer_class(data=self.request.query_params)
+        if not await serializer.ais_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        player_id = await TezosUser.objects.filter(address=serializer.validated_data['address']).values_list(
+            'id', flat=True).afirst()
+        response = StreamingHttpResponse(stream(broker.subscribe(player_id)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class GetDailyStats(ReplicaReadMixin, AsyncGenericAPIView):
+    serializer_class = DailyStatsSerializer
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="Staff only. Daily games, active players and tokens dropped and transferred per token "
+                              "from the rollup tables filled by the rollup_stats command; days without activity are "
+                              "left out.",
+        responses={
+            "200": openapi.Response(
+                description="Rollups of each day in the range.",
+                examples={
+                    "application/json": {
+                        "response": [{
+                            "day": "2024-03-01",
+                            "games_started": 1520,
+                            "games_ended": 1210,
+                            "games_abandoned": 290,
+                            "active_players": 312,
+                            "tokens": [{"token_id": 1, "dropped": 40, "transferred": 35}]
+                        }]
+                    }
+                }
+            )
+        },
+        query_serializer=serializer_class)
+    async def get(self, request):
+        serializer = self.serializer_class(data=self.request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        days = {'day__gte': serializer.validated_data['since'], 'day__lte': serializer.validated_data['until']}
+        response = {stats.day: {
+            'day': stats.day,
+            'games_started': stats.games_started,
+            'games_ended': stats.games_ended,
+            'games_abandoned': stats.games_abandoned,
+            'active_players': stats.active_players,
+            'tokens': [],
+        } async for stats in DailyStats.objects.filter(**days)}
+        async for token_stats in DailyTokenStats.objects.filter(**days).order_by('day', 'token_id'):
+            day = response.setdefault(token_stats.day, {'day': token_stats.day, 'games_started': 0, 'games_ended': 0,
+                                                        'games_abandoned': 0, 'active_players': 0, 'tokens': []})
+            day['tokens'].append({'token_id': token_stats.token_id, 'dropped': token_stats.dropped,
+                                  'transferred': token_stats.transferred})
+        return Response({'response': [response[day] for day in sorted(response)]}, status=status.HTTP_200_OK)
+
+
+class ExportData(AsyncGenericAPIView):
+    serializer_class = ExportSerializer
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="Staff only. Streams sessions, drops or transfers, live and archived, as CSV or JSON "
+                              "lines ordered by id; resume with after_id set to the id of the last row received.",
+        query_serializer=serializer_class)
+    async def get(self, request):
+        serializer = self.serializer_class(data=self.request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        options = serializer.validated_data
+        dataset, export_format = options['dataset'], options['file_format']
+        encoder = Encoder(dataset, export_format)
+        filters = (options['since'], options['until'], options['after_id'], options['limit'])
+        # Each server must get an iterator of its own kind, otherwise Django reads the whole body into memory.
+        if isinstance(request._request, WSGIRequest):
+            content = replica_stream(encoder.chunks(iter_rows(dataset, *filters)))
+        else:
+            content = areplica_stream(encoder.achunks(aiter_rows(dataset, *filters)))
+        response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+        return response
+
+
+def replica_stream(chunks):
+    with replica_reads():
+        yield from chunks
+
+
+async def areplica_stream(chunks):
+    with replica_reads():
+        async for chunk in chunks:
+            yield chunk
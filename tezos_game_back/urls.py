@@ -15,24 +15,20 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, re_path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from django.urls import path, include
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Tezos game API",
-        default_version='v1',
-        description="Api for Sample Tezos Game",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from api.metrics import metrics_view
+from api.schema import schema_document_view, swagger_ui_view
 
 urlpatterns = [
     path('back/admin/', admin.site.urls),
     path('back/api/', include('api.urls')),
-    # re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('back/swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('back/metrics/', metrics_view),
+    path('back/swagger/schema.json', schema_document_view, {'format': 'json'}, name='schema-json'),
+    path('back/swagger/schema.yaml', schema_document_view, {'format': 'yaml'}, name='schema-yaml'),
+    path('back/swagger/', swagger_ui_view, name='schema-swagger-ui'),
 ]
+
+# Serves admin static files when DEBUG is on, as runserver did before gunicorn.
+urlpatterns += staticfiles_urlpatterns()